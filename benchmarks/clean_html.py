@@ -0,0 +1,103 @@
+"""
+CourtFetcher.clean_html'in eski (çok geçişli) ve yeni yolunu kaydedilmiş ham
+getDokuman yanıtları üzerinde karşılaştırır; çıktıların birebir aynı olduğunu
+doğrular ve MB/s raporlar.
+
+Ham yanıtlar CourtFetcher(raw_dir=...) ile kaydedilebilir.
+
+    python -m benchmarks.clean_html raw_payloads/ --repeat 3
+    python -m benchmarks.clean_html --synthetic 2000
+"""
+import os
+import re
+import sys
+import html
+import json
+import time
+import random
+import argparse
+
+from court_fetcher import CourtFetcher
+
+
+def clean_html_reference(content: str) -> str:
+    """clean_html'in tek geçişe indirilmeden önceki hâli."""
+    content = re.sub(r'<.*?>', '\n', content)
+    content = html.unescape(content)
+    content = re.sub(r'\n+', '\n', content)
+    content = content.replace('\u00a0', '')
+    content = re.sub(r'(?<!\d)([a-zçğıöşü])([A-ZÇĞİÖŞÜ])', r'\1\n\2', content)
+    content = re.sub(r'"([^"]+)"([A-ZÇĞİÖŞÜ])', r'"\1"\n\2', content)
+    content = re.sub(r'(K\.)\s*([A-ZÇĞİÖŞÜ]+)', r'\1\n\2', content)
+    return content.strip()
+
+
+def load_payloads(raw_dir: str):
+    payloads = []
+    for file in sorted(os.listdir(raw_dir)):
+        if not file.endswith(".json"):
+            continue
+        with open(os.path.join(raw_dir, file), encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except ValueError:
+                continue
+        if isinstance(data.get("data"), str):
+            payloads.append(data["data"])
+    return payloads
+
+
+def synthetic_payloads(n: int):
+    random.seed(0)
+    words = ["Davacı", "vekili", "tarafından", "K.", "HÜKÜM", "&nbsp;", "&quot;Onama&quot;",
+             "Dairesi", "bozulmasına", "oybirliğiyle", "karar", "verildi.", "2019/1234", "E."]
+    payloads = []
+    for _ in range(n):
+        paragraphs = [
+            "<p>" + " ".join(random.choice(words) for _ in range(random.randint(20, 80))) + "</p>"
+            for _ in range(random.randint(10, 40))
+        ]
+        payloads.append("<html><body>" + "<br>\n".join(paragraphs) + "</body></html>")
+    return payloads
+
+
+def measure(func, payloads, repeat: int) -> float:
+    total_bytes = sum(len(p.encode("utf-8")) for p in payloads) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            func(payload)
+    elapsed = time.perf_counter() - start
+    return total_bytes / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("raw_dir", nargs="?")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N synthetic payloads instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.raw_dir:
+        payloads = load_payloads(args.raw_dir)
+    else:
+        payloads = synthetic_payloads(args.synthetic or 500)
+
+    if not payloads:
+        print("❌ No payloads found.")
+        sys.exit(1)
+
+    mismatches = sum(1 for p in payloads if clean_html_reference(p) != CourtFetcher.clean_html(p))
+    old = measure(clean_html_reference, payloads, args.repeat)
+    new = measure(CourtFetcher.clean_html, payloads, args.repeat)
+
+    print(f"payloads: {len(payloads)}")
+    print(f"mismatches: {mismatches}")
+    print(f"old: {old:.1f} MB/s")
+    print(f"new: {new:.1f} MB/s ({new / old:.2f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+FetchEngine'in docs/sec değerini yerel bir getDokuman taklidine karşı ölçer.
+
+Taklit sunucu hem proxy hem de kaynak sunucu gibi davranır: requests, proxy
+üzerinden giden HTTP isteklerini mutlak URL ile gönderdiği için tüm proxy'ler
+aynı yerel porta yönlendirilebilir.
+
+    python -m benchmarks.fetch_engine --docs 2000 --proxies 20 --concurrency 2
+"""
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from court_fetcher import CourtCase, FetchEngine, Proxy
+from rate_control import RateController
+
+SAMPLE_BODY = (
+    "<html><body><p>T.C. YARGITAY</p><p>1. Hukuk Dairesi</p><p>İçtihat Metni</p>"
+    "<p>Taraflar arasındaki davanın yapılan yargılaması sonunda verilen hükmün "
+    "temyizen incelenmesi istenilmekle dosya incelendi gereği düşünüldü.</p>"
+    "<p>Sonuç: Hükmün ONANMASINA, oybirliğiyle karar verildi.</p></body></html>"
+) * 20
+
+
+def make_handler(latency: float, failure_rate: float):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            doc_id = query.get("id", ["0"])[0]
+            if latency:
+                time.sleep(latency)
+            if random.random() < failure_rate:
+                body = json.dumps({"data": None, "metadata": {"FMTY": "ERROR"}})
+            else:
+                body = json.dumps({"data": f"<p>{doc_id}</p>" + SAMPLE_BODY, "metadata": {"FMTY": "SUCCESS"}})
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def make_cases(n: int):
+    return [
+        CourtCase(str(i), "1. Hukuk Dairesi", f"2020/{i}", f"2021/{i}", "01.02.2021")
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--proxies", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in response delay (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--initial-rate", type=float, default=1000.0, help="RateController starting req/s")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, args.failure_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    proxies = [Proxy("127.0.0.1", port, "bench", "bench") for _ in range(args.proxies)]
+    with tempfile.TemporaryDirectory() as out_dir:
+        engine = FetchEngine(
+            proxies,
+            concurrency_per_proxy=args.concurrency,
+            output_dir=out_dir,
+            controller=RateController(initial_rate=args.initial_rate, max_rate=10000.0,
+                                      initial_concurrency=args.proxies * args.concurrency),
+            base_url="http://getdokuman.local/getDokuman",
+        )
+        stats = engine.run(make_cases(args.docs))
+
+    server.shutdown()
+    snapshot = engine.metrics.snapshot()
+    stats["metrics"] = {key: snapshot[key] for key in ("requests", "bytes_per_sec", "failures", "time", "gauges")}
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
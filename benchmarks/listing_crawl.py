@@ -0,0 +1,165 @@
+"""
+Liste taramasının devre sayısıyla nasıl ölçeklendiğini yerel SOCKS5 ve HTTP
+taklitlerine karşı ölçer.
+
+SOCKS taklidi, her SOCKS kullanıcı adını (yani her Tor devresini) ayrı bir çıkış
+düğümü gibi ele alır: bir çıkış düğümü aynı anda tek istek işler ve her istek
+--latency kadar sürer. Tek devreli eski düzende tüm işçiler bu sıraya girer.
+
+    python -m benchmarks.listing_crawl --pages 200 --circuits 1 2 4 8
+"""
+import json
+import time
+import socket
+import struct
+import argparse
+import tempfile
+import threading
+import socketserver
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pages import TorCircuitPool, fetch_pages
+from rate_control import RateController
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        page = request.get("data", {}).get("pageNumber", 0)
+        rows = [
+            {"id": page * 100 + i, "daire": "1. Hukuk Dairesi", "esasNo": f"2020/{i}",
+             "kararNo": f"2021/{i}", "kararTarihi": "01.02.2021"}
+            for i in range(100)
+        ]
+        payload = json.dumps({"data": {"data": rows, "recordsTotal": 1000000}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SocksStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, upstream, latency):
+        self.upstream = upstream
+        self.latency = latency
+        self.exit_locks = defaultdict(threading.Lock)
+        # Görülen SOCKS kullanıcı adları (devre kimlikleri), geliş sırasıyla
+        self.users = []
+        super().__init__(("127.0.0.1", 0), SocksHandler)
+
+
+class SocksHandler(socketserver.BaseRequestHandler):
+    """Yalnızca bu benchmark'ın ihtiyaç duyduğu SOCKS5 alt kümesi: kullanıcı/parola + CONNECT."""
+    def recv_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def handle(self):
+        conn = self.request
+        _, n_methods = self.recv_exact(2)
+        methods = self.recv_exact(n_methods)
+        user = "anonymous"
+        if 2 in methods:
+            conn.sendall(b"\x05\x02")
+            _, ulen = self.recv_exact(2)
+            user = self.recv_exact(ulen).decode()
+            plen = self.recv_exact(1)[0]
+            self.recv_exact(plen)
+            conn.sendall(b"\x01\x00")
+        else:
+            conn.sendall(b"\x05\x00")
+
+        _, cmd, _, atyp = self.recv_exact(4)
+        if atyp == 1:
+            self.recv_exact(4)
+        elif atyp == 3:
+            self.recv_exact(self.recv_exact(1)[0])
+        elif atyp == 4:
+            self.recv_exact(16)
+        self.recv_exact(2)
+
+        # Hedef ne olursa olsun yerel HTTP taklidine bağlan
+        upstream = socket.create_connection(self.server.upstream)
+        conn.sendall(b"\x05\x00\x00\x01" + socket.inet_aton("127.0.0.1") + struct.pack(">H", 0))
+
+        self.server.users.append(user)
+        exit_lock = self.server.exit_locks[user]
+
+        def pump_back():
+            try:
+                while True:
+                    data = upstream.recv(65536)
+                    if not data:
+                        break
+                    conn.sendall(data)
+                # Upstream bağlantıyı kapattıysa istemci de zaman aşımını beklemeden öğrensin
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        threading.Thread(target=pump_back, daemon=True).start()
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                # Her istek, devrenin çıkış düğümünde sırayla ve gecikmeyle işlenir
+                with exit_lock:
+                    time.sleep(self.server.latency)
+                    upstream.sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--circuits", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request exit node delay (s)")
+    parser.add_argument("--initial-rate", type=float, default=1000.0, help="RateController starting req/s")
+    args = parser.parse_args()
+
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    http_server.daemon_threads = True
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+
+    socks_server = SocksStandIn(http_server.server_address, args.latency)
+    threading.Thread(target=socks_server.serve_forever, daemon=True).start()
+    socks_port = socks_server.server_address[1]
+
+    results = []
+    for circuits in args.circuits:
+        pool = TorCircuitPool(tor_host="127.0.0.1", socks_ports=(socks_port,), num_circuits=circuits)
+        with tempfile.TemporaryDirectory() as out_dir:
+            start = time.time()
+            controller = RateController(initial_rate=args.initial_rate, max_rate=10000.0)
+            fetch_pages(start_page=1, total_pages=args.pages, pool=pool, controller=controller,
+                        output_dir=out_dir, base_url="http://listing.local/aramadetaylist")
+            elapsed = time.time() - start
+        results.append({"circuits": circuits, "seconds": elapsed, "pages_per_sec": args.pages / elapsed})
+
+    socks_server.shutdown()
+    http_server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
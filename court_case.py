@@ -0,0 +1,46 @@
+import re
+import sys
+from typing import Iterable, List
+
+from fetch_manifest import parse_karar_tarihi
+
+
+class CourtCase:
+    __slots__ = ("id", "daire", "esas_no", "karar_no", "karar_tarihi")
+
+    def __init__(self, id_, daire, esas_no, karar_no, karar_tarihi):
+        self.id = id_
+        self.daire = sys.intern(daire)  # birkaç düzine daire adı milyonlarca kez tekrar ediyor
+        self.esas_no = esas_no
+        self.karar_no = karar_no
+        self.karar_tarihi = karar_tarihi
+
+    def generate_filename(self):
+        daire_clean = re.sub(r'[ .]', '', self.daire)
+        esas_no_clean = self.esas_no.replace("/", "-")
+        karar_no_clean = self.karar_no.replace("/", "-")
+        karar_tarihi_clean = self.karar_tarihi.replace(".", "-")
+        return f"{daire_clean}_E{esas_no_clean}_K{karar_no_clean}_{karar_tarihi_clean}.txt"
+
+    def to_row(self):
+        return (self.id, self.daire, self.esas_no, self.karar_no, self.karar_tarihi)
+
+    def date_key(self) -> int:
+        return parse_karar_tarihi(self.karar_tarihi)
+
+
+def cases_from_items(items: Iterable[dict]) -> List[CourtCase]:
+    """Liste API'sinin satırlarını CourtCase'e çevirir; eksik alanlı satırları atlar."""
+    courts = []
+    for item in items:
+        try:
+            courts.append(CourtCase(
+                id_=str(item["id"]),
+                daire=item["daire"],
+                esas_no=item["esasNo"],
+                karar_no=item["kararNo"],
+                karar_tarihi=item["kararTarihi"]
+            ))
+        except (KeyError, TypeError):
+            continue
+    return courts
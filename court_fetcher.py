@@ -5,10 +5,17 @@ import html
 import time
 import logging
 import threading
+import multiprocessing
 import requests
 from pathlib import Path
-from typing import List
+from typing import Iterable, List
 from queue import Queue
+from concurrent.futures import ProcessPoolExecutor
+from court_case import CourtCase, cases_from_items
+from fetch_manifest import FetchManifest
+from rate_control import RateController, OK, BACKOFF, NEUTRAL, status_signal
+from fetch_metrics import FetchMetrics, MetricsReporter, serve_metrics, failure_reason, status_reason
+from engine.search_engine.decision_store import DecisionStore
 
 # Configure logging
 logging.basicConfig(
@@ -31,40 +38,136 @@ class Proxy:
         proxy_url = f"http://{self.user}:{self.password}@{self.ip}:{self.port}"
         return {'http': proxy_url, 'https': proxy_url}
 
-class ProxyRotator:
-    def __init__(self, proxies: List[Proxy]):
+class ProxyHealth:
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None  # saniye cinsinden üstel hareketli ortalama
+        self.cooldown_until = 0.0
+        self.inflight = 0
+
+    def score(self) -> float:
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        latency = self.latency if self.latency is not None else 1.0
+        return success_rate / (latency * (1 + self.inflight))
+
+class ProxyPool:
+    """
+    Proxy'leri başarı oranı ve gecikmeye göre puanlayan, iş parçacıkları arasında paylaşılan havuz.
+    Hata veren proxy üstel artan bir süre soğumaya alınır. Çağıran yalnızca hiçbir proxy
+    kullanılamıyorsa ve gerçek bir uyku ile bekler.
+    """
+    def __init__(self, proxies: List[Proxy], max_inflight_per_proxy=2,
+                 base_cooldown=5.0, max_cooldown=1800.0, latency_alpha=0.2):
         self.proxies = proxies
-        self.index = 0
-
-    def get_current_proxy(self) -> Proxy:
-        return self.proxies[self.index]
-
-    def rotate(self) -> Proxy:
-        self.index = (self.index + 1)
-        if self.index == len(self.proxies):
-            logging.warning(f"🚫 All proxies failed. Waiting 10 minutes...")
-            simulate_wait(1800)
-            self.index = 0
-        return self.get_current_proxy()
-
-class CourtCase:
-    def __init__(self, id_, daire, esas_no, karar_no, karar_tarihi):
-        self.id = id_
-        self.daire = daire
-        self.esas_no = esas_no
-        self.karar_no = karar_no
-        self.karar_tarihi = karar_tarihi
-
-    def generate_filename(self):
-        daire_clean = re.sub(r'[ .]', '', self.daire)
-        esas_no_clean = self.esas_no.replace("/", "-")
-        karar_no_clean = self.karar_no.replace("/", "-")
-        karar_tarihi_clean = self.karar_tarihi.replace(".", "-")
-        return f"{daire_clean}_E{esas_no_clean}_K{karar_no_clean}_{karar_tarihi_clean}.txt"
+        self.health = {proxy: ProxyHealth() for proxy in proxies}
+        self.max_inflight_per_proxy = max_inflight_per_proxy
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.latency_alpha = latency_alpha
+        self.cooldowns = 0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> Proxy:
+        """En yüksek puanlı kullanılabilir proxy'yi döndürür, yoksa biri açılana kadar bekler."""
+        with self.cond:
+            while True:
+                now = time.time()
+                best, best_score = None, None
+                for proxy, health in self.health.items():
+                    if health.cooldown_until > now or health.inflight >= self.max_inflight_per_proxy:
+                        continue
+                    score = health.score()
+                    if best is None or score > best_score:
+                        best, best_score = proxy, score
+
+                if best is not None:
+                    self.health[best].inflight += 1
+                    return best
+
+                cooldowns = [h.cooldown_until for h in self.health.values() if h.cooldown_until > now]
+                timeout = None
+                if len(cooldowns) == len(self.health):
+                    timeout = min(cooldowns) - now
+                    if timeout >= 1:
+                        logging.warning(f"🚫 All proxies cooling down. Waiting {timeout:.0f}s...")
+                # Serbest kalan bir proxy (release) ya da biten bir soğuma bizi uyandırır
+                self.cond.wait(timeout)
+
+    def release(self, proxy: Proxy, ok: bool, latency: float = None):
+        with self.cond:
+            health = self.health[proxy]
+            health.inflight -= 1
+            if ok:
+                health.successes += 1
+                health.consecutive_failures = 0
+                if latency is not None:
+                    if health.latency is None:
+                        health.latency = latency
+                    else:
+                        health.latency += self.latency_alpha * (latency - health.latency)
+            else:
+                health.failures += 1
+                health.consecutive_failures += 1
+                cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (health.consecutive_failures - 1))
+                health.cooldown_until = time.time() + cooldown
+                self.cooldowns += 1
+            self.cond.notify()
+
+    def snapshot(self) -> dict:
+        with self.cond:
+            now = time.time()
+            return {
+                "proxies": len(self.health),
+                "cooling_down": sum(1 for h in self.health.values() if h.cooldown_until > now),
+                "inflight": sum(h.inflight for h in self.health.values()),
+                "cooldowns": self.cooldowns,
+            }
+
+DOKUMAN_URL = "https://karararama.yargitay.gov.tr/getDokuman"
+# FetchEngine kuyruğunda aynı anda bekleyen en çok karar
+QUEUE_SIZE = 1000
+
+# clean_html için önceden derlenmiş desenler. Geriye bakış (lookbehind) desen başında olursa
+# re modülü ilk karakter kümesine göre hızlı tarama yapamıyor; bu yüzden sona alındı.
+TAG = re.compile(r'<.*?>')
+NEWLINE_RUN = re.compile(r'\n\n+')
+LOWER_UPPER = re.compile(r'([a-zçğıöşü])([A-ZÇĞİÖŞÜ])(?<!\d..)')
+QUOTE_UPPER = re.compile(r'"([^"]+)"([A-ZÇĞİÖŞÜ])')
+K_ABBREVIATION = re.compile(r'(K\.)\s*([A-ZÇĞİÖŞÜ]+)')
+
+# Karar metinlerinde en sık görülen varlıklar; html.unescape her varlık için Python'a geri çağrı yapıyor
+COMMON_ENTITIES = [
+    ("&nbsp;", "\u00a0"), ("&quot;", '"'), ("&lt;", "<"), ("&gt;", ">"), ("&#39;", "'"),
+    ("&#231;", "ç"), ("&#199;", "Ç"), ("&#287;", "ğ"), ("&#286;", "Ğ"), ("&#305;", "ı"), ("&#304;", "İ"),
+    ("&#246;", "ö"), ("&#214;", "Ö"), ("&#351;", "ş"), ("&#350;", "Ş"), ("&#252;", "ü"), ("&#220;", "Ü"),
+]
+
+def unescape(content: str) -> str:
+    """html.unescape ile aynı sonucu verir; yalnızca yaygın varlıklar varsa str.replace ile çözer."""
+    fast = content
+    for entity, char in COMMON_ENTITIES:
+        if entity in fast:
+            fast = fast.replace(entity, char)
+    if '&' not in fast:
+        return fast
+    # &amp;, sayısal ya da bilinmeyen varlıklar: tam çözümleyiciye bırak
+    return html.unescape(content)
 
 class CourtFetcher:
-    def __init__(self, rotator: ProxyRotator):
-        self.rotator = rotator
+    def __init__(self, pool: ProxyPool, manifest: FetchManifest = None, max_attempts=None,
+                 parse_executor=None, raw_dir=None, store: DecisionStore = None,
+                 controller: RateController = None, metrics: FetchMetrics = None, base_url=DOKUMAN_URL):
+        self.pool = pool
+        self.controller = controller or RateController()
+        self.metrics = metrics or FetchMetrics()
+        self.manifest = manifest
+        self.max_attempts = max_attempts
+        self.parse_executor = parse_executor  # verilirse clean_html bu havuzda (ör. ProcessPoolExecutor) çalışır
+        self.raw_dir = raw_dir  # verilirse ham getDokuman yanıtları benchmark için saklanır
+        self.store = store  # verilirse kararlar ayrı .txt dosyaları yerine pakete yazılır
+        self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
@@ -72,80 +175,199 @@ class CourtFetcher:
 
     @staticmethod
     def clean_html(content: str) -> str:
-        content = re.sub(r'<.*?>', '\n', content)
-        content = html.unescape(content)
-        content = re.sub(r'\n+', '\n', content)
-        content = content.replace('\u00a0', '')
-        content = re.sub(r'(?<!\d)([a-zçğıöşü])([A-ZÇĞİÖŞÜ])', r'\1\n\2', content)
-        content = re.sub(r'"([^"]+)"([A-ZÇĞİÖŞÜ])', r'"\1"\n\2', content)
-        content = re.sub(r'(K\.)\s*([A-ZÇĞİÖŞÜ]+)', r'\1\n\2', content)
+        content = TAG.sub('\n', content)
+        if '&' in content:
+            content = unescape(content)
+        content = NEWLINE_RUN.sub('\n', content)
+        if '\u00a0' in content:
+            content = content.replace('\u00a0', '')
+        content = LOWER_UPPER.sub(r'\1\n\2', content)
+        content = QUOTE_UPPER.sub(r'"\1"\n\2', content)
+        content = K_ABBREVIATION.sub(r'\1\n\2', content)
         return content.strip()
 
+    def parse(self, content: str) -> str:
+        start = time.time()
+        if self.parse_executor is None:
+            cleaned = self.clean_html(content)
+        else:
+            cleaned = self.parse_executor.submit(CourtFetcher.clean_html, content).result()
+        self.metrics.record_parse(time.time() - start)
+        return cleaned
+
     def fetch_case(self, court: CourtCase, output_dir="courts"):
         filename = court.generate_filename()
         out_path = Path(output_dir) / filename
 
-        if out_path.exists():
+        if self.manifest is not None:
+            if self.manifest.is_fetched(court.id):
+                logging.debug(f"Skipping fetched case: {filename}")
+                return True
+        elif self.store is not None:
+            if filename in self.store:
+                logging.debug(f"Skipping stored case: {filename}")
+                return True
+        elif out_path.exists():
             logging.debug(f"Skipping existing file: {filename}")
             return True
 
-        url = f"https://karararama.yargitay.gov.tr/getDokuman?id={court.id}"
+        url = f"{self.base_url}?id={court.id}"
 
+        attempts = 0
         while True:
-            proxy = self.rotator.get_current_proxy()
+            if self.max_attempts is not None and attempts >= self.max_attempts:
+                logging.error(f"❌ Giving up on {filename} after {attempts} attempts")
+                if self.manifest is not None:
+                    self.manifest.mark_failed(court.id)
+                return False
+            attempts += 1
+
+            self.controller.acquire()
+            proxy = self.pool.acquire()
+            start = time.time()
+            ok = False
+            signal = NEUTRAL
+            reason = None
+            nbytes = 0
             try:
                 response = self.session.get(url, proxies=proxy.get_proxy_dict(), timeout=15)
+                nbytes = len(response.content)
 
                 if response.status_code != 200:
+                    signal = status_signal(response.status_code)
+                    reason = status_reason(response.status_code)
                     raise Exception(f"Bad status {response.status_code}")
 
                 data = response.json()
 
                 if data.get("metadata", {}).get("FMTY", "").upper() != "SUCCESS":
+                    signal = BACKOFF
+                    reason = "fmty"
                     raise Exception("FMTY not success")
 
-                cleaned_content = self.clean_html(data["data"])
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                out_path.write_text(cleaned_content, encoding='utf-8')
+                ok = True
+                signal = OK
+
+            except Exception as e:
+                if isinstance(e, requests.Timeout):
+                    signal = BACKOFF
+                reason = reason or failure_reason(e)
+                logging.warning(f"Exception for {filename} using {proxy.ip}:{proxy.port}: {e}")
+
+            finally:
+                latency = time.time() - start
+                self.pool.release(proxy, ok, latency)
+                self.controller.release(signal)
+                self.metrics.record_request(f"{proxy.ip}:{proxy.port}", latency, nbytes, reason)
+
+            if ok:
+                try:
+                    if self.raw_dir is not None:
+                        raw_path = Path(self.raw_dir) / f"{court.id}.json"
+                        raw_path.parent.mkdir(parents=True, exist_ok=True)
+                        raw_path.write_bytes(response.content)
+                    cleaned_content = self.parse(data["data"])
+                    if self.store is not None:
+                        self.store.put(filename, cleaned_content)
+                    else:
+                        out_path.parent.mkdir(parents=True, exist_ok=True)
+                        out_path.write_text(cleaned_content, encoding='utf-8')
+                except Exception as e:
+                    # Ayrıştırma / yazma hatası yeniden indirmekle düzelmez; karar başarısız sayılır
+                    logging.error(f"❌ Could not save {filename}: {e}")
+                    if self.manifest is not None:
+                        self.manifest.mark_failed(court.id)
+                    return False
+                if self.manifest is not None:
+                    self.manifest.mark_fetched(court.id)
                 logging.info(f"✅ Saved: {filename}")
                 return True
 
+class FetchEngine:
+    """
+    Tüm kararları tek bir ortak kuyruktan dağıtan iş parçacığı havuzu.
+    Her proxy için `concurrency_per_proxy` kadar işçi açılır ve hepsi aynı ProxyPool'u
+    paylaşır; kötü bir proxy soğumaya alınırken diğerleri kuyruktan çekmeye devam eder.
+    Kuyruk queue_size ile sınırlıdır: run() kararları bir yineleyiciden (ör. manifest.pending())
+    işçiler tükettikçe ekler, tüm liste hiçbir zaman bellekte tutulmaz.
+    """
+    def __init__(self, proxies: List[Proxy], concurrency_per_proxy=2, max_workers=None,
+                 manifest: FetchManifest = None, max_attempts=None, parse_executor=None,
+                 store: DecisionStore = None, controller: RateController = None, metrics: FetchMetrics = None,
+                 output_dir="courts", base_url=DOKUMAN_URL, queue_size=QUEUE_SIZE):
+        self.proxies = proxies
+        self.store = store
+        self.controller = controller or RateController()
+        self.metrics = metrics or FetchMetrics()
+        self.manifest = manifest
+        self.max_attempts = max_attempts
+        self.parse_executor = parse_executor
+        self.concurrency_per_proxy = concurrency_per_proxy
+        self.max_workers = max_workers
+        self.output_dir = output_dir
+        self.base_url = base_url
+        self.pool = ProxyPool(proxies, max_inflight_per_proxy=concurrency_per_proxy)
+        self.queue = Queue(maxsize=queue_size)
+        self.done = 0
+        self.lock = threading.Lock()
+        self.metrics.register_gauge("queue_depth", self.queue.qsize)
+        self.metrics.register_gauge("proxy_pool", self.pool.snapshot)
+        self.metrics.register_gauge("rate_controller", self.controller.snapshot)
+
+    def _worker(self):
+        fetcher = CourtFetcher(self.pool, manifest=self.manifest, max_attempts=self.max_attempts,
+                               parse_executor=self.parse_executor, store=self.store,
+                               controller=self.controller, metrics=self.metrics, base_url=self.base_url)
+        while True:
+            court = self.queue.get()
+            if court is None:  # run() her işçi için bir bitiş işareti koyar
+                self.queue.task_done()
+                return
+            try:
+                if fetcher.fetch_case(court, output_dir=self.output_dir):
+                    with self.lock:
+                        self.done += 1
             except Exception as e:
-                logging.warning(f"Exception for {filename} using {proxy.ip}:{proxy.port}: {e}")
-                self.rotator.rotate()
+                # Beklenmeyen bir hata işçiyi öldürüp kuyrukta iş bırakmamalı
+                logging.exception(f"❌ Unexpected error for case {court.id}: {e}")
+                if self.manifest is not None:
+                    self.manifest.mark_failed(court.id)
+            finally:
+                self.queue.task_done()
+
+    def run(self, courts: Iterable[CourtCase]) -> dict:
+        num_workers = len(self.proxies) * self.concurrency_per_proxy
+        if self.max_workers:
+            num_workers = min(num_workers, self.max_workers)
+        num_workers = max(1, num_workers)
+
+        start = time.time()
+        threads = []
+        for i in range(num_workers):
+            t = threading.Thread(target=self._worker, name=f"Thread-{i+1}")
+            t.start()
+            threads.append(t)
 
+        # Kuyruk doluyken put() bekler; kararlar işçiler ilerledikçe okunur
+        for court in courts:
+            self.queue.put(court)
+        for _ in threads:
+            self.queue.put(None)
 
-def simulate_wait(wait):
-    end_time = time.time() + wait
-    dummy = 0
-    while time.time() < end_time:
-        dummy += 0
+        for t in threads:
+            t.join()
 
+        elapsed = time.time() - start
+        stats = {
+            "docs": self.done,
+            "workers": num_workers,
+            "seconds": elapsed,
+            "docs_per_sec": self.done / elapsed if elapsed > 0 else 0.0,
+        }
+        logging.info(f"📊 {stats['docs']} docs in {elapsed:.1f}s with {num_workers} workers "
+                     f"({stats['docs_per_sec']:.1f} docs/sec)")
+        return stats
 
-def load_all_courts(input_dir="pages") -> List[CourtCase]:
-    courts = []
-    files = sorted(
-        [f for f in os.listdir(input_dir) if f.startswith("page_") and f.endswith(".json")],
-        key=lambda x: int(re.search(r'page_(\d+)\.json', x).group(1))
-    )
-    for file in files:
-        with open(os.path.join(input_dir, file), encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                for item in data.get("data", []):
-                    try:
-                        courts.append(CourtCase(
-                            id_=str(item["id"]),
-                            daire=item["daire"],
-                            esas_no=item["esasNo"],
-                            karar_no=item["kararNo"],
-                            karar_tarihi=item["kararTarihi"]
-                        ))
-                    except (KeyError, TypeError):
-                        continue
-            except Exception as e:
-                logging.error(f"❌ Failed to load {file}: {e}")
-    return courts
 
 def load_proxies(filename="proxies.txt") -> List[Proxy]:
     proxies = []
@@ -156,12 +378,6 @@ def load_proxies(filename="proxies.txt") -> List[Proxy]:
                 proxies.append(Proxy(*parts))
     return proxies
 
-def worker(courts: List[CourtCase], proxies: List[Proxy]):
-    rotator = ProxyRotator(proxies)
-    fetcher = CourtFetcher(rotator)
-    for court in courts:
-        fetcher.fetch_case(court)
-
 def get_existing_case_ids(output_dir="courts") -> set:
     """Çekilen Yargıtay kararlarının dosya adlarını kontrol ederek mevcut karar ID'lerini döndürür."""
     existing_filenames = set()
@@ -173,96 +389,90 @@ def get_existing_case_ids(output_dir="courts") -> set:
 
     return existing_filenames
 
-def get_sorted_cases(input_dir="pages") -> List[CourtCase]:
-    """Sayfa dosyalarını sıralı bir şekilde al ve tüm kararları döndür."""
-    cases = []
-
-    files = sorted(
-        [f for f in os.listdir(input_dir) if f.startswith("page_") and f.endswith(".json")],
+def page_files(input_dir="pages") -> List[str]:
+    """Sayfa dosyaları numara sırasıyla, ardından artımlı taramanın delta dosyaları zaman sırasıyla."""
+    files = os.listdir(input_dir)
+    pages = sorted(
+        [f for f in files if f.startswith("page_") and f.endswith(".json")],
         key=lambda x: int(re.search(r'page_(\d+)\.json', x).group(1))
     )
-
-    for file in files:
-        with open(os.path.join(input_dir, file), encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                for item in data.get("data", []):
-                    try:
-                        cases.append(CourtCase(
-                            id_=str(item["id"]),
-                            daire=item["daire"],
-                            esas_no=item["esasNo"],
-                            karar_no=item["kararNo"],
-                            karar_tarihi=item["kararTarihi"]
-                        ))
-                    except (KeyError, TypeError):
-                        continue
-            except Exception as e:
-                logging.error(f"❌ Failed to load {file}: {e}")
-    
-    # Sıralama, karar tarihine veya başka bir kritere göre yapılabilir
-    cases.sort(key=lambda x: x.karar_tarihi)  # kararı tarihe göre sıralıyoruz
-    return cases
-
-def determine_new_cases(existing_filenames: set, input_dir="pages") -> List[CourtCase]:
-    """Yeni Yargıtay kararlarını belirler, mevcut olanları dışarıda bırakır."""
-    new_cases = []
-    existing_cases = get_sorted_cases(input_dir)
-
-    for new_case in existing_cases:
-        # Yeni kararın dosya ismini oluştur
-        filename = new_case.generate_filename()
-
-        # Eğer bu dosya adı daha önce çekilmişse, geç
-        if filename not in existing_filenames:
-            new_cases.append(new_case)
-
-    return new_cases
+    deltas = sorted(f for f in files if f.startswith("delta_") and f.endswith(".json"))
+    return pages + deltas
+
+def load_page(path) -> List[CourtCase]:
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return cases_from_items(data.get("data", []))
+
+def sync_manifest(manifest: FetchManifest, input_dir="pages", output_dir="courts", store: DecisionStore = None):
+    """Yalnızca yeni ya da değişmiş sayfa dosyalarındaki kararları manifest'e ekler."""
+    fetched_filenames = frozenset()
+    if manifest.is_empty():
+        # Tek seferlik geçiş: manifest'ten önce çekilmiş kararları fetched olarak işaretle
+        logging.info("📂 Bootstrapping manifest from existing files...")
+        fetched_filenames = set(store.names()) if store is not None else set()
+        if os.path.isdir(output_dir):
+            fetched_filenames |= get_existing_case_ids(output_dir)
+
+    for file in page_files(input_dir):
+        path = os.path.join(input_dir, file)
+        stat = os.stat(path)
+        if manifest.is_source_ingested(file, stat.st_mtime, stat.st_size):
+            continue
+        try:
+            courts = load_page(path)
+        except Exception as e:
+            logging.error(f"❌ Failed to load {file}: {e}")
+            continue
+        manifest.add_cases(
+            ((court.to_row(), court.generate_filename()) for court in courts),
+            source=(file, stat.st_mtime, stat.st_size),
+            fetched_filenames=fetched_filenames,
+        )
 
 def main():
-    from threading import Thread
-
-    num_threads = 8
+    concurrency_per_proxy = 2
+    max_attempts = 10
+    parse_workers = os.cpu_count() or 1
+    # /metrics uç noktasının portu; 0 boş bir port seçer (aynı makinede birden çok çekici çalışabilir)
+    metrics_port = int(os.environ.get("FETCH_METRICS_PORT", 0))
     all_proxies = load_proxies()
 
     if not all_proxies:
         logging.error("No proxies found.")
         return
 
-    # Daha önce çekilen kararların dosya isimlerini al
-    existing_filenames = get_existing_case_ids()
-
-    # Yeni kararları belirle
-    new_cases_all = determine_new_cases(existing_filenames)
+    # Sayfa dosyalarındaki yeni kararları manifest'e ekle ve bekleyenleri al
+    manifest = FetchManifest()
+    store = DecisionStore("decisions")
+    sync_manifest(manifest, store=store)
+    total_pending = manifest.count_pending()
 
-    if not new_cases_all:
+    if not total_pending:
         logging.info("No new court cases found to process.")
         return
 
-    file_per_iteration = 50000
-    num_iter = len(new_cases_all) // file_per_iteration + 1
-    total_cases = len(new_cases_all)
-    logging.info(f"Total new cases: {total_cases}")
-    for k in range(num_iter):
-        new_cases = new_cases_all[k*file_per_iteration:(k+1)*file_per_iteration]
-        chunk_size = len(new_cases) // num_threads
-        proxy_chunks = [all_proxies[i::num_threads] for i in range(num_threads)]
-        court_chunks = [new_cases[i:i + chunk_size] for i in range(0, len(new_cases), chunk_size)]
-
-        threads = []
-        for i in range(num_threads):
-            proxy_list = proxy_chunks[i % len(proxy_chunks)]
-            court_list = court_chunks[i % len(court_chunks)]
-            t = Thread(target=worker, args=(court_list, proxy_list), name=f"Thread-{i+1}")
-            t.start()
-            threads.append(t)
-
-        for t in threads:
-            t.join()
-
-        if k < num_iter - 1:  # Sonraki gruptan önce bekle
-            logging.info(f"✅ Finished processing chunk. Waiting for 3 hours...")
-            simulate_wait(7200)
+    # HTML temizliği GIL'i ağ iş parçacıklarıyla paylaşmasın diye ayrı süreçlerde yapılır
+    parse_executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    logging.info(f"Total new cases: {total_pending}")
+    # Sabit saatlik molalar yerine tüm işçiler sunucunun gerçek sınırına uyum sağlayan tek denetleyiciyi paylaşır
+    controller = RateController()
+    metrics = FetchMetrics()
+    reporter = MetricsReporter(metrics, "fetch_metrics.json")
+    reporter.start()
+    try:
+        serve_metrics(metrics, port=metrics_port)
+    except OSError as e:
+        logging.warning(f"⚠️ Metrics endpoint unavailable on port {metrics_port} ({e}); "
+                        f"writing fetch_metrics.json only")
+    engine = FetchEngine(all_proxies, concurrency_per_proxy=concurrency_per_proxy,
+                         manifest=manifest, max_attempts=max_attempts, parse_executor=parse_executor,
+                         store=store, controller=controller, metrics=metrics)
+    engine.run(CourtCase(*row) for row in manifest.pending())
+    reporter.stop()
+    parse_executor.shutdown()
+    store.close()
     logging.info("✅ All new court cases processed successfully")
 
 
@@ -0,0 +1,142 @@
+"""
+Farklı FAISS index türlerinin (Flat, IVF-PQ, HNSW, SQfp16/SQ8 ...) recall@k / gecikme /
+bellek dengesini ölçer. Gerçek doğru cevaplar aynı vektörler üzerindeki Flat (kaba kuvvet,
+float32) index'ten alınır; sorgular üretimdeki gibi tek tek aranır. --rescore ile her ayar
+ayrıca top_k * r aday alınıp float32 vektörlerle yeniden puanlanarak ölçülür.
+
+Vektörler bir .npy dosyasından ya da mevcut bir Flat faiss.index'ten okunabilir;
+hiçbiri verilmezse kümelenmiş sentetik vektörler üretilir.
+
+    python -m benchmarks.ann_recall --vectors database/faiss.index --queries 500 \\
+        --factory "IVF4096,PQ64" "HNSW32,Flat" --nprobe 8 32 128 --ef-search 32 64 256
+    python -m benchmarks.ann_recall --synthetic 200000 --dim 256 --factory SQfp16 SQ8 --rescore 0 4
+"""
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+from search_engine.vector_database import create_index, rescore_candidates, search_parameters
+
+
+def load_vectors(path: str) -> np.ndarray:
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r").astype("float32")
+    index = faiss.read_index(path)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 256) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    assignments = rng.integers(0, clusters, size=n)
+    vectors = centers[assignments] + 0.3 * rng.normal(size=(n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def index_bytes(index) -> int:
+    return faiss.serialize_index(index).nbytes
+
+
+def run_queries(index, queries: np.ndarray, k: int, params=None, vectors=None, rescore: int = 0):
+    latencies = np.empty(len(queries))
+    results = np.full((len(queries), k), -1, dtype="int64")
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        if rescore > 1:
+            _, labels = index.search(query[None, :], k * rescore, params=params)
+            _, labels = rescore_candidates(query, labels[0], vectors)
+            labels = labels[None, :k]
+        else:
+            _, labels = index.search(query[None, :], k, params=params)
+        latencies[i] = time.perf_counter() - start
+        results[i, :labels.shape[1]] = labels[0]
+    return results, latencies
+
+
+def recall_at_k(results: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(np.intersect1d(r[r >= 0], t)) for r, t in zip(results, truth))
+    return hits / truth.size
+
+
+def report(name, setting, results, latencies, truth, nbytes, build_seconds, ntotal):
+    return {
+        "index": name,
+        "setting": setting,
+        "recall": recall_at_k(results, truth),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "memory_mb": nbytes / 1e6,
+        "bytes_per_vector": nbytes / ntotal,
+        "build_seconds": build_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", help=".npy file or a Flat faiss.index")
+    parser.add_argument("--synthetic", type=int, default=100000, help="number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factory", nargs="+", default=["IVF1024,PQ64", "HNSW32,Flat", "SQfp16", "SQ8"])
+    parser.add_argument("--train-size", type=int, default=100000)
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0],
+                        help="candidate multipliers for float32 re-scoring (0 = off)")
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = load_vectors(args.vectors)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    rng = np.random.default_rng(1)
+    query_ids = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    # Sorgular: veritabanındaki cümlelerin hafifçe bozulmuş kopyaları
+    queries = vectors[query_ids] + 0.05 * rng.normal(size=(len(query_ids), vectors.shape[1])).astype("float32")
+    dim = vectors.shape[1]
+
+    start = time.perf_counter()
+    flat = create_index(dim, "Flat")
+    flat.add(vectors)
+    flat_build = time.perf_counter() - start
+    truth, latencies = run_queries(flat, queries, args.k)
+    rows = [report("Flat", "-", truth, latencies, truth, index_bytes(flat), flat_build, len(vectors))]
+
+    for factory in args.factory:
+        start = time.perf_counter()
+        index = create_index(dim, factory, args.ef_construction)
+        if not index.is_trained:
+            sample = vectors[rng.choice(len(vectors), size=min(args.train_size, len(vectors)), replace=False)]
+            index.train(sample)
+        index.add(vectors)
+        build = time.perf_counter() - start
+        nbytes = index_bytes(index)
+
+        settings = [("-", None)]
+        if search_parameters(index, nprobe=1) is not None:
+            settings = [(f"nprobe={n}", search_parameters(index, nprobe=n)) for n in args.nprobe]
+        elif search_parameters(index, ef_search=1) is not None:
+            settings = [(f"efSearch={e}", search_parameters(index, ef_search=e)) for e in args.ef_search]
+
+        for setting, params in settings:
+            for rescore in args.rescore:
+                results, latencies = run_queries(index, queries, args.k, params, vectors, rescore)
+                label = f"{setting} r={rescore}" if rescore > 1 else setting
+                rows.append(report(factory, label, results, latencies, truth, nbytes, build, len(vectors)))
+
+    print(f"vectors: {len(vectors)} x {dim}, queries: {len(queries)}, recall@{args.k} vs Flat (float32)")
+    print(f"{'index':<18}{'setting':<20}{'recall':>8}{'Δrecall':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'B/vec':>8}{'MB':>10}{'build s':>9}")
+    for row in rows:
+        print(f"{row['index']:<18}{row['setting']:<20}{row['recall']:>8.3f}{row['recall'] - 1:>+9.3f}"
+              f"{row['p50_ms']:>9.3f}{row['p99_ms']:>9.3f}{row['bytes_per_vector']:>8.0f}"
+              f"{row['memory_mb']:>10.1f}{row['build_seconds']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+build_faiss_in_batches'in parçalı (shard) gömme yolunu BGE-M3 yerine küçük, deterministik
+bir taklit kodlayıcıyla ölçer: işçi sayısına göre cümle/sn ve yarıda kesilen bir kurulumun
+yeniden çalıştırıldığında tamamlanmış parçaları yeniden kullandığı doğrulanır.
+
+    python -m benchmarks.embedding_build --sentences 50000 --workers 0 2 4 --threads 1
+    python -m benchmarks.embedding_build --sentences 20000 --resume-check
+"""
+import os
+import glob
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+
+import faiss
+import numpy as np
+
+from search_engine.vector_database import build_faiss_in_batches
+
+DIM = 256
+FAIL_AFTER_ENV = "STAND_IN_FAIL_AFTER"
+
+
+class StandInEncoder:
+    """BGEM3FlagModel.encode_corpus arayüzünü taklit eder; işlemci yükü için birkaç matris çarpımı yapar."""
+    def __init__(self, rounds=8):
+        self.projection = np.random.default_rng(0).normal(size=(DIM, DIM)).astype("float32") / DIM ** 0.5
+        self.rounds = rounds
+        self.calls = 0
+        self.fail_after = int(os.environ.get(FAIL_AFTER_ENV, 0))
+
+    def encode_corpus(self, batch, max_length=512):
+        self.calls += 1
+        if self.fail_after and self.calls > self.fail_after:
+            raise RuntimeError("simulated crash")
+        seeds = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in batch]
+        vectors = np.stack([np.random.default_rng(seed).normal(size=DIM) for seed in seeds]).astype("float32")
+        for _ in range(self.rounds):
+            vectors = np.tanh(vectors @ self.projection)
+        return {"dense_vecs": vectors}
+
+
+def stand_in_encoder(device="cpu"):
+    return StandInEncoder()
+
+
+def write_corpus(path: str, n: int, duplicate_rate: float = 0.2):
+    random.seed(0)
+    words = ["davacı", "vekili", "temyiz", "hükmün", "bozulmasına", "karar", "verildi", "dosya",
+             "incelendi", "gereği", "düşünüldü", "mahkemesince", "yerinde", "görülmediğinden"]
+    boilerplate = ["Hükmün bozulmasına, oybirliğiyle karar verildi.", "Temyiz itirazlarının reddine karar verildi."]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            if random.random() < duplicate_rate:
+                sentence = random.choice(boilerplate)
+            else:
+                sentence = " ".join(random.choice(words) for _ in range(random.randint(8, 30))) + f" {i}."
+            f.write(json.dumps({"sentence": sentence, "file": f"{i // 50}HukukDairesi_2020_{i // 50}.txt"},
+                               ensure_ascii=False) + "\n")
+
+
+def build(work_dir, jsonl_path, args, workers):
+    start = time.perf_counter()
+    build_faiss_in_batches(
+        jsonl_path, batch_size=args.shard_size,
+        faiss_path=os.path.join(work_dir, "faiss.index"), metadata_path=os.path.join(work_dir, "metadata.bin"),
+        device="cpu", workers=workers, threads_per_worker=args.threads,
+        encoder="benchmarks.embedding_build:stand_in_encoder",
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=50000)
+    parser.add_argument("--shard-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--threads", type=int, default=1, help="threads per worker")
+    parser.add_argument("--resume-check", action="store_true", help="crash a build midway, then resume it")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        jsonl_path = os.path.join(work_dir, "sentences.jsonl")
+        write_corpus(jsonl_path, args.sentences)
+
+        if args.resume_check:
+            workers = max(args.workers)
+            # Her işçi birkaç parçadan sonra çöker; tamamlanmış parçalar diskte kalır
+            os.environ[FAIL_AFTER_ENV] = str(2 * args.shard_size // 16)
+            try:
+                build(work_dir, jsonl_path, args, workers)
+            except RuntimeError as e:
+                print(f"💥 first build failed: {e}")
+            del os.environ[FAIL_AFTER_ENV]
+            done = len(glob.glob(os.path.join(work_dir, "faiss.index.shards", "shard-*.npy")))
+            elapsed = build(work_dir, jsonl_path, args, workers)
+            index = faiss.read_index(os.path.join(work_dir, "faiss.index"))
+            print(f"resumed with {done} completed shards, finished in {elapsed:.1f}s, {index.ntotal} vectors")
+            return
+
+        results = []
+        for workers in args.workers:
+            elapsed = build(work_dir, jsonl_path, args, workers)
+            results.append((workers, elapsed))
+
+    print(f"{'workers':>8}{'seconds':>10}{'sent/s':>10}")
+    for workers, elapsed in results:
+        print(f"{workers:>8}{elapsed:>10.1f}{args.sentences / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+BM25 index'inin (search_engine.lexical) kurulum süresini, boyutunu ve sorgu gecikmesini ölçer.
+Metadata verilmezse Zipf dağılımlı sentetik Türkçe benzeri cümleler üretilir; sorgular
+1-6 terimlik serbest metin ve "2019/1234 E." biçiminde künyelerdir.
+
+    python -m benchmarks.lexical_search --metadata database/metadata.bin --queries 1000
+    python -m benchmarks.lexical_search --synthetic 500000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from search_engine.lexical import LexicalIndex, build_lexical_index
+from search_engine.sentence_metadata import SentenceMetadata, load_metadata
+
+SYLLABLES = ["ka", "rar", "da", "va", "cı", "tem", "yiz", "hük", "mün", "boz", "ul", "ma", "sı", "na", "iş",
+             "çi", "kı", "dem", "taz", "mi", "nat", "ı", "ve", "kil", "i", "mah", "ke", "me", "si", "ce"]
+
+
+def synthetic_metadata(path: str, n: int):
+    random.seed(0)
+    vocabulary = ["".join(random.choices(SYLLABLES, k=random.randint(2, 4))) for _ in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    entries = []
+    for i in range(n):
+        sentence = " ".join(random.choices(vocabulary, weights, k=random.randint(6, 30)))
+        if i % 20 == 0:
+            sentence += f" {2000 + i % 25}/{i} E."
+        entries.append((sentence, f"{i // 50}HukukDairesi_2020_{i // 50}.txt"))
+    SentenceMetadata.write(path, entries)
+    return vocabulary, weights
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--metadata", help="existing metadata.bin")
+    parser.add_argument("--synthetic", type=int, default=200000, help="number of synthetic sentences")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        metadata_path = args.metadata
+        if metadata_path is None:
+            metadata_path = os.path.join(work_dir, "metadata.bin")
+            synthetic_metadata(metadata_path, args.synthetic)
+        metadata = load_metadata(metadata_path)
+
+        lexical_path = os.path.join(work_dir, "lexical.bin")
+        start = time.perf_counter()
+        terms = build_lexical_index(metadata, lexical_path)
+        build = time.perf_counter() - start
+        lexical = LexicalIndex(lexical_path)
+
+        # Sorgular: rastgele cümlelerden seçilen terimler ve künyeler
+        rng = random.Random(1)
+        live = [i for i in range(len(metadata)) if metadata[i] is not None]
+        queries = []
+        for _ in range(args.queries):
+            words = metadata[rng.choice(live)][0].split()
+            queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(1, 6)))))
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            lexical.search(query, top_k=args.k)
+            latencies.append(time.perf_counter() - start)
+
+        print(f"sentences: {len(metadata)}, terms: {terms}, postings: {len(lexical.doc_ids)}")
+        print(f"build: {build:.1f}s, size: {os.path.getsize(lexical_path) / 1e6:.1f} MB")
+        print(f"top-{args.k} latency: p50 {np.percentile(latencies, 50) * 1000:.2f} ms, "
+              f"p99 {np.percentile(latencies, 99) * 1000:.2f} ms")
+        lexical.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+LocalQueryEncoder'ın mikro-toplama (micro-batching) ve LRU önbellek etkisini ölçer. BGE-M3
+yerine benchmarks.embedding_build'deki taklit kodlayıcı kullanılır; her ileri geçişe
+--overhead-ms kadar sabit maliyet eklenerek modelin çağrı başı yükü taklit edilir.
+Eşzamanlı istemciler (--clients) sorguları aynı anda gönderir; --repeat oranındaki sorgular
+daha önce sorulmuş bir sorgunun tekrarıdır (önbellek isabeti).
+
+    python -m benchmarks.query_encoder --clients 16 --queries 2000 --max-batch 1 8 32
+"""
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.embedding_build import StandInEncoder
+from search_engine.query_encoder import LocalQueryEncoder
+
+
+class SlowStandInEncoder(StandInEncoder):
+    def __init__(self, overhead: float):
+        super().__init__()
+        self.overhead = overhead
+
+    def encode_corpus(self, batch, max_length=512):
+        time.sleep(self.overhead)
+        return super().encode_corpus(batch, max_length)
+
+
+def make_queries(n: int, repeat: float):
+    random.seed(0)
+    words = ["kıdem", "tazminatı", "işçi", "fesih", "haklı", "neden", "ihbar", "süresi", "temyiz", "bozma",
+             "kira", "tespit", "tahliye", "nafaka", "velayet", "boşanma", "miras", "tapu", "iptal", "tescil"]
+    queries = []
+    for _ in range(n):
+        if queries and random.random() < repeat:
+            queries.append(random.choice(queries))
+        else:
+            queries.append(" ".join(random.choices(words, k=random.randint(2, 6))))
+    return queries
+
+
+def run(args, max_batch: int, cache_size: int):
+    encoder = LocalQueryEncoder(lambda device: SlowStandInEncoder(args.overhead_ms / 1000), device="cpu",
+                                max_batch=max_batch, max_wait=args.max_wait_ms / 1000, cache_size=cache_size)
+    queries = make_queries(args.queries, args.repeat)
+    latencies = np.empty(len(queries))
+
+    def query(i):
+        start = time.perf_counter()
+        encoder.encode(queries[i])
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(query, range(len(queries))))
+    elapsed = time.perf_counter() - start
+    stats = encoder.stats()
+    encoder.close()
+    return elapsed, latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--overhead-ms", type=float, default=10.0, help="fixed cost per forward pass")
+    parser.add_argument("--repeat", type=float, default=0.3, help="fraction of repeated queries")
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'batch':>6}{'cache':>7}{'q/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'hit rate':>10}{'mean batch':>12}")
+    for max_batch in args.max_batch:
+        for cache_size in (0, args.cache_size):
+            elapsed, latencies, stats = run(args, max_batch, cache_size)
+            print(f"{max_batch:>6}{'on' if cache_size else 'off':>7}{args.queries / elapsed:>9.0f}"
+                  f"{np.percentile(latencies, 50) * 1000:>9.2f}{np.percentile(latencies, 99) * 1000:>9.2f}"
+                  f"{stats['hit_rate']:>10.2f}{stats['mean_batch']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+FinalAnswerNode'dan websocket istemcisine token akışını yerel, taklit bir sohbet modeliyle
+(token başına --token-ms gecikmeli) uçtan uca çalıştırır ve ilk token süresini
+(time-to-first-token) tam cevabı bekleyip tek mesajla göndermekle karşılaştırır.
+İstemci, ui/src/pages/chat/chat.tsx gibi parçaları [END] gelene kadar birleştirir.
+
+    python -m benchmarks.streaming --tokens 200 --token-ms 20
+"""
+import re
+import time
+import asyncio
+import argparse
+
+import websockets
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import StateGraph, END, START
+
+from nodes.final import FinalAnswerNode
+from nodes.state import AgentState
+from pipeline_runner import PipelineRunner
+
+
+class SlowFakeChatModel(BaseChatModel):
+    """Sabit cevabı boşluklardan bölünmüş tokenler hâlinde, token başına gecikmeyle üretir."""
+    answer: str
+    token_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _tokens(self):
+        return re.split(r"(\s)", self.answer)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        # Akışsız çağrı da tüm tokenlerin üretilmesini bekler
+        time.sleep(self.token_seconds * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in self._tokens():
+            time.sleep(self.token_seconds)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def build_app(tokens: int, token_seconds: float):
+    answer = " ".join(f"kelime{i}" for i in range(tokens))
+    llm = SlowFakeChatModel(answer=answer, token_seconds=token_seconds)
+
+    def search(state: AgentState):
+        return {"documents": ["9. Hukuk Dairesi, E2019-1234\nDavacı vekili temyiz etti."], "files": []}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("search", search)
+    workflow.add_node("answer", FinalAnswerNode(llm=llm))
+    workflow.add_edge(START, "search")
+    workflow.add_edge("search", "answer")
+    workflow.add_edge("answer", END)
+    return workflow.compile(), answer
+
+
+def make_handler(runner, streaming: bool):
+    async def handler(websocket):
+        async for message in websocket:
+            inputs = {"query": message, "messages": None, "documents": [], "files": [], "filters": None}
+            if streaming:
+                async for chunk in runner.stream(inputs, node="answer"):
+                    await websocket.send(chunk)
+            else:
+                result = await runner.invoke(inputs)
+                await websocket.send(result["messages"])
+            await websocket.send("[END]")
+    return handler
+
+
+async def run(streaming: bool, args):
+    app, answer = build_app(args.tokens, args.token_ms / 1000)
+    runner = PipelineRunner(app)
+    async with websockets.serve(make_handler(runner, streaming), "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as websocket:
+            start = time.perf_counter()
+            await websocket.send("Kıdem tazminatı nasıl hesaplanır?")
+            first, parts = None, []
+            while True:
+                data = await websocket.recv()
+                if data == "[END]":
+                    break
+                if first is None:
+                    first = time.perf_counter() - start
+                parts.append(data)
+            total = time.perf_counter() - start
+    runner.close()
+    assert "".join(parts) == answer, "streamed answer differs from the model output"
+    return first, total, len(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'first token ms':>16}{'total ms':>10}{'messages':>10}")
+    for streaming in (False, True):
+        first, total, messages = asyncio.run(run(streaming, args))
+        print(f"{'stream' if streaming else 'invoke':<10}{first * 1000:>16.0f}{total * 1000:>10.0f}{messages:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+custom_sentence_tokenize'ın eski (yer tutuculu, çok geçişli) hâli ile tek geçişli
+sentence_spans tarayıcısını depodaki karar örnekleri üzerinde karşılaştırır;
+çıktıların aynı olduğunu doğrular ve MB/s raporlar.
+
+Eski hâl, kısaltma listesindeki eksik virgüller düzeltilmiş olarak çalıştırılır;
+aksi hâlde "Müh.Ltd." gibi birleşmiş girdiler hiç korunmaz ve fark beklenendir.
+
+    python -m benchmarks.tokenizer ./decisions --sample 2000 --repeat 3
+    python -m benchmarks.tokenizer --synthetic 2000
+"""
+import re
+import sys
+import time
+import random
+import argparse
+
+from search_engine.sentence import ABBREVIATIONS, clean_text, custom_sentence_tokenize, extract_main_body
+
+
+def custom_sentence_tokenize_reference(text):
+    """custom_sentence_tokenize'ın tek geçişe indirilmeden önceki hâli."""
+    text = re.sub(r'\s*\n\s*', ' ', text)
+
+    placeholder_map = {}
+    for i, abbr in enumerate(ABBREVIATIONS):
+        placeholder = f"<<ABBR_{i}>>"
+        text = text.replace(abbr, placeholder)
+        placeholder_map[placeholder] = abbr
+
+    pattern = r'(?<=[a-zçğıöşü])\.(?=\s+[A-ZÇĞİÖŞÜ])'
+    sentences = re.split(pattern, text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    restored_sentences = []
+    for s in sentences:
+        for placeholder, abbr in placeholder_map.items():
+            s = s.replace(placeholder, abbr)
+        restored_sentences.append(s)
+    return restored_sentences
+
+
+def load_sample(store_path: str, n: int):
+    from search_engine.decision_store import DecisionStore
+
+    store = DecisionStore(store_path)
+    names = sorted(store.names())
+    random.seed(0)
+    names = random.sample(names, min(n, len(names)))
+    texts = [clean_text(extract_main_body(store.read(name))) for name in names]
+    store.close()
+    return texts
+
+
+def synthetic_texts(n: int):
+    random.seed(0)
+    words = ["Davacı", "vekili", "Av.", "Ali", "tarafından", "A.Ş.", "aleyhine", "açılan", "davada",
+             "K.D.V.", "Ltd.", "Şti.", "Müh.", "Tic.", "İth.", "vs.", "karar", "verildi.", "Dairesi",
+             "bozulmasına.", "Dr.", "Prof.", "oybirliğiyle", "2019/1234", "E.", "Mah.", "İnş.", "San."]
+    return [
+        " ".join(random.choice(words) for _ in range(random.randint(200, 2000)))
+        for _ in range(n)
+    ]
+
+
+def measure(func, texts, repeat: int) -> float:
+    total_bytes = sum(len(t.encode("utf-8")) for t in texts) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return total_bytes / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("store", nargs="?")
+    parser.add_argument("--sample", type=int, default=2000, help="number of decisions to sample from the store")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N synthetic texts instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.store:
+        texts = load_sample(args.store, args.sample)
+    else:
+        texts = synthetic_texts(args.synthetic or 500)
+
+    if not texts:
+        print("❌ No decisions found.")
+        sys.exit(1)
+
+    mismatches = sum(1 for t in texts if custom_sentence_tokenize_reference(t) != custom_sentence_tokenize(t))
+    old = measure(custom_sentence_tokenize_reference, texts, args.repeat)
+    new = measure(custom_sentence_tokenize, texts, args.repeat)
+
+    print(f"decisions: {len(texts)}")
+    print(f"mismatches: {mismatches}")
+    print(f"old: {old:.1f} MB/s")
+    print(f"new: {new:.1f} MB/s ({new / old:.2f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
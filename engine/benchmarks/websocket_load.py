@@ -0,0 +1,86 @@
+"""
+Websocket sunucusunun eşzamanlı istemcilerle ölçeklenmesini ölçer. Gerçek hat yerine, çoğu
+G/Ç beklemesi (LLM çağrısı gibi) olan --pipeline-ms süreli taklit bir app.invoke kullanılır.
+"inline" hattı olay döngüsünde doğrudan çağırır (eski davranış), "runner" PipelineRunner
+üzerinden çalıştırır. Her istemci --messages mesajı sırayla gönderir.
+
+    python -m benchmarks.websocket_load --clients 1 4 16 32 --max-inflight 8 --max-queued 32
+"""
+import json
+import time
+import asyncio
+import argparse
+
+import numpy as np
+import websockets
+
+from pipeline_runner import PipelineOverloaded, PipelineRunner
+
+
+class StandInApp:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def invoke(self, inputs: dict) -> dict:
+        time.sleep(self.seconds)
+        return {"messages": f"cevap: {inputs['query']}"}
+
+
+def make_handler(app, runner):
+    async def handler(websocket):
+        async for message in websocket:
+            inputs = {"query": message, "messages": None, "documents": [], "files": [], "filters": None}
+            try:
+                result = await runner.invoke(inputs) if runner else app.invoke(inputs)
+                await websocket.send(result["messages"])
+            except PipelineOverloaded as e:
+                await websocket.send(json.dumps({"error": str(e), "retry": True}))
+    return handler
+
+
+async def client(port: int, messages: int, latencies: list, rejected: list):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as websocket:
+        for i in range(messages):
+            start = time.perf_counter()
+            await websocket.send(f"soru {i}")
+            reply = await websocket.recv()
+            if reply.startswith("{"):
+                rejected.append(1)
+            else:
+                latencies.append(time.perf_counter() - start)
+
+
+async def run(mode: str, clients: int, args):
+    app = StandInApp(args.pipeline_ms / 1000)
+    runner = PipelineRunner(app, args.max_inflight, args.max_queued) if mode == "runner" else None
+    latencies, rejected = [], []
+    async with websockets.serve(make_handler(app, runner), "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, args.messages, latencies, rejected) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    if runner:
+        runner.close()
+    return len(latencies) / elapsed, latencies, len(rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--messages", type=int, default=5, help="messages per client")
+    parser.add_argument("--pipeline-ms", type=float, default=200.0)
+    parser.add_argument("--max-inflight", type=int, default=8)
+    parser.add_argument("--max-queued", type=int, default=32)
+    parser.add_argument("--modes", nargs="+", default=["inline", "runner"])
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'clients':>8}{'answers/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'rejected':>10}")
+    for mode in args.modes:
+        for clients in args.clients:
+            throughput, latencies, rejected = asyncio.run(run(mode, clients, args))
+            p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if latencies else (0.0, 0.0)
+            print(f"{mode:<8}{clients:>8}{throughput:>11.1f}{p50:>9.0f}{p99:>9.0f}{rejected:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,58 +3,124 @@ import asyncio
 import websockets
 import json
 import faiss
-import pickle
 from langgraph.graph import StateGraph, END, START
+from nodes.cache import CacheLookupNode, CacheStoreNode, SemanticCache, index_version, route_cache
 from nodes.final import FinalAnswerNode
 from nodes.search import SearchEngineNode
 from nodes.state import AgentState
+from pipeline_runner import PipelineOverloaded, PipelineRunner
+from search_engine.lexical import LexicalIndex
+from search_engine.filters import FilterIndex, validate_filters
+from search_engine.query_encoder import LocalQueryEncoder, RemoteQueryEncoder
+from search_engine.sentence_metadata import load_metadata
+from search_engine.vector_database import load_vectors
 import chainlit as cl
 
 
 # Initialize OpenAI API
 os.environ["OPENAI_API_KEY"] = ""
 faiss_path = "database/faiss.index"
-metadata_path = "database/metadata.pkl"
+metadata_path = "database/metadata.bin"
 index = faiss.read_index(str(faiss_path))
-with open(metadata_path, "rb") as f:
-    metadata = pickle.load(f)
+# Sütunlu metadata mmap ile açılır; cümleler kimlikle istendikçe okunur
+metadata = load_metadata(metadata_path)
+# Nicemlenmiş (SQfp16/SQ8) index'ler için varsa float32 vektörlerle yeniden puanlama
+vectors = load_vectors("database/vectors.f32", index.d)
+# BM25 index'i (python -m search_engine.lexical) varsa hibrit arama yapılır
+lexical_path = "database/lexical.bin"
+lexical = LexicalIndex(lexical_path) if os.path.exists(lexical_path) else None
+# Daire / yıl filtreleri (python -m search_engine.filters)
+filters_path = "database/filters.bin"
+filter_index = FilterIndex(filters_path) if os.path.exists(filters_path) else None
+if filter_index is None:
+    print(f"⚠️ {filters_path} bulunamadı; filtreli istekler reddedilecek.", flush=True)
+# Sorgu gömme: QUERY_ENCODER=local modeli süreç içinde CPU'da çalıştırır, varsayılan uzak API
+if os.environ.get("QUERY_ENCODER", "remote") == "local":
+    query_encoder = LocalQueryEncoder(device="cpu")
+else:
+    query_encoder = RemoteQueryEncoder()
 
 # Initialize nodes for workflow
-search_node = SearchEngineNode(index, metadata)
+search_node = SearchEngineNode(index, metadata, vectors=vectors, rescore=4, lexical=lexical,
+                               filter_index=filter_index, query_encoder=query_encoder)
 final_node = FinalAnswerNode()
+# Anlamsal cevap önbelleği: benzer sorular (kosinüs >= eşik) arama ve LLM'e gitmeden cevaplanır;
+# FAISS index'i yeniden kurulunca boşaltılır
+cache = SemanticCache(query_encoder, threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.95)),
+                      ttl=float(os.environ.get("SEMANTIC_CACHE_TTL", 3600)),
+                      capacity=int(os.environ.get("SEMANTIC_CACHE_SIZE", 1000)),
+                      version=lambda: index_version(faiss_path))
 
 # Create the workflow graph
 workflow = StateGraph(AgentState)
 
 # Add nodes to the graph
+# BM25 index'i yoksa her sorgu yoğun aramayla (gömülerek) aranır
+search_mode = search_node.mode if lexical is not None else "dense"
+workflow.add_node("cache", CacheLookupNode(cache, mode=search_mode))
 workflow.add_node("search", search_node)
 workflow.add_node("answer", final_node)
+workflow.add_node("cache_store", CacheStoreNode(cache, mode=search_mode))
 
 # Define the edges between nodes
-workflow.add_edge(START, "search")
+workflow.add_edge(START, "cache")
+workflow.add_conditional_edges("cache", route_cache, {"hit": END, "miss": "search"})
 workflow.add_edge("search", "answer")
-workflow.add_edge("answer", END)
+workflow.add_edge("answer", "cache_store")
+workflow.add_edge("cache_store", END)
 
 # Set the entry point of the graph
 app = workflow.compile()
 
+# Hat olay döngüsü dışında, sınırlı bir havuzda çalışır; aynı anda en çok MAX_INFLIGHT_PIPELINES
+# hat çalışır, MAX_QUEUED_PIPELINES'tan fazla istek beklerse yenileri reddedilir
+runner = PipelineRunner(app, max_inflight=int(os.environ.get("MAX_INFLIGHT_PIPELINES", 8)),
+                        max_queued=int(os.environ.get("MAX_QUEUED_PIPELINES", 32)))
+
 async def handle_message(websocket, message):
     try:
-        # Prepare inputs for the workflow
-        inputs = {"query": message, "messages": None, "documents": [], "files": []}
-        
-        # Invoke the workflow
-        result = app.invoke(inputs)
+        if message.strip() == "/stats":
+            # Önbellek isabet oranı / kazanılan süre, sorgu kodlayıcısı ve hat yükü
+            await websocket.send(json.dumps({"cache": cache.stats(), "query_encoder": query_encoder.stats(),
+                                             "pipeline": runner.stats()}))
+            await websocket.send("[END]")
+            return
 
-        # Extract the output messages
-        output = result["messages"]
+        # Prepare inputs for the workflow; a JSON message may carry filters:
+        # {"query": "...", "filters": {"daire": "9. Hukuk Dairesi", "year_from": 2018}}
+        query, filters = message, None
+        if message.lstrip().startswith("{"):
+            request = json.loads(message)
+            query, filters = request["query"], request.get("filters")
+        if filters is not None:
+            try:
+                validate_filters(filters)
+            except ValueError as e:
+                await websocket.send(json.dumps({"error": f"geçersiz filtre: {e}"}))
+                await websocket.send("[END]")
+                return
+        if filters and filter_index is None:
+            # Filtre sessizce yok sayılırsa kullanıcı filtresiz sonuçları filtreli sanır
+            await websocket.send(json.dumps({"error": f"{filters_path} yok; daire / yıl filtresi uygulanamıyor"}))
+            await websocket.send("[END]")
+            return
+        inputs = {"query": query, "messages": None, "documents": [], "files": [], "filters": filters}
+        
+        # Stream the answer tokens as they are generated, without blocking other sessions;
+        # the client appends chunks until the [END] sentinel
+        async for chunk in runner.stream(inputs, node="answer"):
+            await websocket.send(chunk)
+        await websocket.send("[END]")
 
-        # Send back the response to the client
-        await websocket.send(output)
+    except PipelineOverloaded as e:
+        print(f"Rejected: {e}", flush=True)
+        await websocket.send(json.dumps({"error": str(e), "retry": True}))
+        await websocket.send("[END]")
 
     except Exception as e:
         print(f"Error: {e}", flush=True)
         await websocket.send(json.dumps({"error": str(e)}))
+        await websocket.send("[END]")
 
 async def websocket_server(websocket):
     try:
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from nodes.state import AgentState
+from search_engine.lexical import is_citation_query
+
+
+def lexical_only(query: str, mode: str = "auto") -> bool:
+    """Arama bu sorguyu gömmeden yalnızca BM25 ile yapar mı (bkz. search_hybrid)."""
+    return mode == "lexical" or (mode == "auto" and is_citation_query(query))
+
+
+def index_version(path: str):
+    """Index dosyasının kimliği; yeniden kurulum (os.replace) inode / mtime / boyutu değiştirir."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class SemanticCache:
+    """
+    Son sorguların gömmelerini küçük, bellek içi bir FAISS index'inde (kosinüs benzerliği)
+    cevapları ve bulunan kararlarla birlikte tutar. Aynı sorunun farklı ifadeleri threshold
+    benzerliğin üstündeyse (ve filtreler aynıysa) arama ve LLM çağrısı atlanıp cevap
+    doğrudan döner. Girdiler ttl saniye sonra ve capacity aşılınca en az yakın zamanda
+    kullanılandan başlayarak atılır; version() değişirse (index yeniden kuruldu) önbellek boşaltılır.
+    """
+    def __init__(self, query_encoder, threshold: float = 0.95, ttl: float = 3600, capacity: int = 1000,
+                 version=None, neighbours: int = 4):
+        self.query_encoder = query_encoder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.capacity = capacity
+        self.version = version
+        self.neighbours = neighbours
+        self.lock = threading.Lock()
+        self.index = None
+        self.entries = OrderedDict()  # kimlik -> girdi, en eski kullanılan başta
+        self.next_id = 0
+        self.current_version = version() if version else None
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _embed(self, query: str, vector=None):
+        if vector is None:
+            vector = self.query_encoder.encode(query)
+        if vector is None:
+            return None
+        vector = np.array(vector, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, ids):
+        for i in ids:
+            del self.entries[i]
+        if ids:
+            self.index.remove_ids(np.array(ids, dtype="int64"))
+
+    def _check_version(self):
+        if self.version is None:
+            return
+        version = self.version()
+        if version != self.current_version:
+            self.current_version = version
+            self._clear()
+
+    def _expire(self, now: float):
+        expired = [i for i, entry in self.entries.items() if now - entry["created"] > self.ttl]
+        self.evictions += len(expired)
+        self._remove(expired)
+
+    def _clear(self):
+        self.entries.clear()
+        if self.index is not None:
+            self.index.reset()
+        self.invalidations += 1
+
+    def invalidate(self):
+        with self.lock:
+            self._clear()
+
+    def lookup(self, query: str, filters=None, vector=None):
+        """Eşleşen girdi ya da None. vector verilirse (sorgunun gömmesi) yeniden gömülmez."""
+        vector = self._embed(query, vector)
+        if vector is None:
+            return None
+        key = json.dumps(filters, sort_keys=True, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self._check_version()
+            self.lookups += 1
+            if self.index is None or not self.entries:
+                return None
+            similarities, ids = self.index.search(vector, min(self.neighbours, len(self.entries)))
+            for similarity, i in zip(similarities[0], ids[0]):
+                entry = self.entries.get(int(i))
+                if entry is None or similarity < self.threshold:
+                    continue
+                if now - entry["created"] > self.ttl:
+                    self.evictions += 1
+                    self._remove([int(i)])
+                    continue
+                if entry["filters"] != key:
+                    continue
+                self.entries.move_to_end(int(i))
+                self.hits += 1
+                self.saved_seconds += entry["seconds"]
+                return entry
+        return None
+
+    def store(self, query: str, filters, result: dict, seconds: float, vector=None):
+        """Tamamlanan hattın cevabını ekler; seconds, isabetlerde kazanılan süre olarak sayılır."""
+        if not result.get("messages"):
+            return
+        vector = self._embed(query, vector)
+        if vector is None:
+            return
+        now = time.time()
+        with self.lock:
+            self._check_version()
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            self._expire(now)
+            if len(self.entries) >= self.capacity:
+                oldest = list(self.entries)[:len(self.entries) - self.capacity + 1]
+                self.evictions += len(oldest)
+                self._remove(oldest)
+            i = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(vector, np.array([i], dtype="int64"))
+            self.entries[i] = {
+                "query": query,
+                "filters": json.dumps(filters, sort_keys=True, ensure_ascii=False),
+                "messages": result["messages"],
+                "documents": result["documents"],
+                "files": result["files"],
+                "created": now,
+                "seconds": seconds,
+            }
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# 0. Nodes for the semantic answer cache in front of search -> answer
+# Künye gibi yalnızca BM25 ile aranan sorgular (mode, SearchEngineNode'unki) önbelleği atlar;
+# yalnızca önbelleğe bakmak için gömme isteği yapılmaz. Diğerlerinin gömmesi query_vector
+# olarak aramaya geçer, ıskalamada sorgu ikinci kez gömülmez.
+class CacheLookupNode:
+    def __init__(self, cache: SemanticCache, mode: str = "auto"):
+        super().__init__()
+        self.cache = cache
+        self.mode = mode
+
+    def __call__(self, state: AgentState):
+        started = time.time()
+        if lexical_only(state["query"], self.mode):
+            return {"cache_hit": False, "started_at": started, "query_vector": None}
+        vector = self.cache.query_encoder.encode(state["query"])
+        entry = self.cache.lookup(state["query"], state.get("filters"), vector)
+        if entry is None:
+            return {"cache_hit": False, "started_at": started, "query_vector": vector}
+        return {"cache_hit": True, "messages": entry["messages"],
+                "documents": entry["documents"], "files": entry["files"]}
+
+
+class CacheStoreNode:
+    def __init__(self, cache: SemanticCache, mode: str = "auto"):
+        super().__init__()
+        self.cache = cache
+        self.mode = mode
+
+    def __call__(self, state: AgentState):
+        if lexical_only(state["query"], self.mode):
+            return {}
+        self.cache.store(state["query"], state.get("filters"), state, time.time() - state["started_at"],
+                         state.get("query_vector"))
+        return {}
+
+
+def route_cache(state: AgentState) -> str:
+    return "hit" if state.get("cache_hit") else "miss"
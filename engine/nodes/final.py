@@ -1,14 +1,14 @@
 from nodes.state import AgentState
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
-from langchain.chains import LLMChain
 
 # 3. Node for Generating the Final Answer with Streaming
 class FinalAnswerNode:
-    def __init__(self):
+    def __init__(self, llm=None):
         super().__init__()
-        self.llm = ChatOpenAI(model="gpt-4o")  # Enable streaming
- 
+        # app.stream(stream_mode="messages") altında model token token akar (bkz. PipelineRunner.stream)
+        self.llm = llm if llm is not None else ChatOpenAI(model="gpt-4o", streaming=True)
+
     def __call__(self, state: AgentState):
         document_text = "\n".join(state["documents"])
         prompt = ChatPromptTemplate.from_messages(
@@ -19,18 +19,19 @@ class FinalAnswerNode:
                 ),
                 (
                     "human",
-                    f"Yargıtay kararları aşağıdaki gibi verilmiştir:\n{document_text}\nSana verilen yargıtay kararlarına göre aşağıdaki soruyu cevaplar mısın? Soruyu cevaplarken sana verilen kararlardan referans cümleler vermeyi unutma. Referans verdiğin yargıtay kararlarının karar ve emsal numaralarını da ver. Eğer yargıtay kararı verilmemişse kısace bu soruya cevap veremeyeceğini söyle. Soru şu şekildedir:\n{{query}}."
+                    "Yargıtay kararları aşağıdaki gibi verilmiştir:\n{documents}\nSana verilen yargıtay kararlarına göre aşağıdaki soruyu cevaplar mısın? Soruyu cevaplarken sana verilen kararlardan referans cümleler vermeyi unutma. Referans verdiğin yargıtay kararlarının karar ve emsal numaralarını da ver. Eğer yargıtay kararı verilmemişse kısace bu soruya cevap veremeyeceğini söyle. Soru şu şekildedir:\n{query}."
                 ),
             ]
         )
 
-        chain = LLMChain(prompt=prompt, llm=self.llm)
-        
-        # Invoke the LLM with a callback to handle streaming
+        chain = prompt | self.llm
+
+        # Kararlar şablona değişken olarak verilir; metindeki { } şablon sözdizimi sanılmaz
         final_answer = chain.invoke(
             {
+                "documents": document_text,
                 "query": state["query"],
             }
         )
 
-        return {"messages": final_answer["text"]}
+        return {"messages": final_answer.content}
@@ -1,9 +1,6 @@
 from nodes.state import AgentState
-from search_engine.vector_database import search_faiss
-import os
-from search_engine.sentence import *
-
-import difflib
+from search_engine.vector_database import search_hybrid
+from search_engine.sentence_metadata import SentenceMetadata
 
 import re
 
@@ -26,45 +23,54 @@ def transform_string(input_string):
     return transformed_string
 
 
-def find_concatenate_similar(string, string_list):
-    # Find the most similar element with at least 90% similarity
-    matcher = difflib.get_close_matches(string, string_list, n=1, cutoff=0.9)
-    
-    if not matcher:
-        return None
-    
-    matched_string = matcher[0]
-    index = string_list.index(matched_string)
-    
-    # Concatenate the previous, matched, and next elements if available
-    previous_string = string_list[index - 1] if index > 0 else ""
-    next_string = string_list[index + 1] if index < len(string_list) - 1 else ""
-    
-    concatenated_string = previous_string + ". " + matched_string + ". " +  next_string
-    
-    return concatenated_string
+def context_window(metadata, result, window=1):
+    """
+    Bulunan cümleyi karardaki önceki ve sonraki window cümlesiyle birleştirir. Komşular
+    metadata'daki (karar, cümle sırası) kaydından konumla okunur; karar yeniden okunmaz.
+    """
+    if isinstance(metadata, SentenceMetadata):
+        sentences = metadata.context(result["id"], window, result["file"])
+    else:
+        # Eski pickle listesi: bir kararın cümleleri ardışık kimliklerdedir
+        i = result["id"]
+        sentences = [metadata[j][0] for j in range(max(i - window, 0), min(i + window + 1, len(metadata)))
+                     if metadata[j] is not None and metadata[j][1] == result["file"]]
+    return ". ".join(sentences)
 
-# 1. Node for BM25-based Search Engine API Query
+# 1. Node for hybrid (BM25 + FAISS) search
 class SearchEngineNode:
-    def __init__(self, index, metadata):
+    def __init__(self, index, metadata, nprobe=None, ef_search=None, vectors=None, rescore=0,
+                 lexical=None, mode="auto", filter_index=None, query_encoder=None):
         super().__init__()
         self.index = index
         self.metadata = metadata
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.vectors = vectors
+        self.rescore = rescore
+        self.lexical = lexical
+        self.mode = mode
+        self.filter_index = filter_index
+        self.query_encoder = query_encoder
 
     def __call__(self, state : AgentState):
-        # Make a request to the BM25 search API
+        # BM25 ve FAISS sonuçları RRF ile birleştirilir; künye sorguları yalnızca BM25 ile aranır
         retrieved_list = []
         files = []
-        results = search_faiss(state["query"], self.index, self.metadata, top_k=10)
+        # Daire / yıl filtreleri aramadan önce uygulanır; top-k yalnızca uyan cümlelerden seçilir
+        # (kümeler ve seçiciler filtre başına önbelleklenir)
+        filters = state.get("filters")
+        allowed_ids = selector = None
+        if self.filter_index is not None:
+            allowed_ids = self.filter_index.ids(filters)
+            selector = self.filter_index.selector(filters)
+        results = search_hybrid(state["query"], self.index, self.metadata, self.lexical, top_k=10,
+                                mode=self.mode, allowed_ids=allowed_ids, filters=filters, nprobe=self.nprobe,
+                                ef_search=self.ef_search, vectors=self.vectors, rescore=self.rescore,
+                                query_encoder=self.query_encoder, selector=selector,
+                                query_vector=state.get("query_vector"))
         for result in results:
-            with open(os.path.join("courts", result["file"]), "r", encoding="utf-8") as f:
-                body = extract_main_body(f.read())
-                body = clean_text(body)
-                sentences = custom_sentence_tokenize(body)
-                sentences = merge_short_sentences(sentences)
-                retrieved_list.append(transform_string(result["file"]) + "\n"+ find_concatenate_similar(result["sentence"], sentences))
-
-
+            retrieved_list.append(transform_string(result["file"]) + "\n" + context_window(self.metadata, result))
             files.append(result["file"])
 
         return {"documents": retrieved_list, "files": files}
@@ -1,4 +1,4 @@
-from typing import TypedDict, List
+from typing import Any, TypedDict, List, Optional
 
 from langchain.docstore.document import Document
 
@@ -12,5 +12,13 @@ class AgentState(TypedDict):
     documents: List[Document]
 
     files: List[str]
+    # Optional search filters, e.g. {"daire": "9. Hukuk Dairesi", "year_from": 2018, "year_to": 2020}
+    filters: Optional[dict]
+    # Set by the semantic cache lookup: whether the answer came from the cache, and when the
+    # pipeline started (to account the latency a later hit saves)
+    cache_hit: Optional[bool]
+    started_at: Optional[float]
+    # The query embedding computed for the cache lookup, reused by the search on a miss
+    query_vector: Optional[Any]
     # The outcome of a given call to the agent
     # Needs `None` as a valid type, since this is what this will start as
@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PipelineOverloaded(RuntimeError):
+    """Tüm yuvalar dolu ve bekleme kuyruğu da doluyken gelen istek reddedilir."""
+
+
+class PipelineRunner:
+    """
+    Senkron LangGraph uygulamasını (app.invoke) olay döngüsünü bloklamadan, sınırlı bir iş
+    parçacığı havuzunda çalıştırır. Aynı anda en çok max_inflight hat çalışır; yuva bekleyen
+    istek sayısı max_queued'u aşarsa yeni istekler PipelineOverloaded ile hemen reddedilir
+    (kabul denetimi), böylece yük altında gecikme sınırsız büyümez.
+    FAISS araması ve LLM çağrısı GIL'i bıraktığından hatlar paralel ilerler.
+    """
+    def __init__(self, app, max_inflight: int = 8, max_queued: int = 32):
+        self.app = app
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="pipeline")
+        # Sayaçlar yalnızca olay döngüsünden değiştirilir; kilit gerekmez
+        self.slots = asyncio.Semaphore(max_inflight)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, func, *args):
+        """func(*args)'ı bir yuva alarak havuzda çalıştırır."""
+        if self.slots.locked() and self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise PipelineOverloaded(f"sunucu meşgul ({self.max_inflight} çalışan, {self.waiting} bekleyen istek)")
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.slots.release()
+
+    async def invoke(self, inputs: dict) -> dict:
+        return await self.run(self.app.invoke, inputs)
+
+    async def stream(self, inputs: dict, node: str = None):
+        """
+        Hattı app.stream(stream_mode="messages") ile havuzda çalıştırır ve node düğümündeki
+        LLM'in ürettiği metin parçalarını geldikçe verir. Model akış yapmadıysa (parça
+        gelmediyse) son durumdaki "messages" metni tek parça olarak verilir.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+
+        def produce():
+            streamed = False
+            final = None
+            for mode, payload in self.app.stream(inputs, stream_mode=["messages", "values"]):
+                if mode == "values":
+                    final = payload
+                    continue
+                message, metadata = payload
+                if node is not None and metadata.get("langgraph_node") != node:
+                    continue
+                if isinstance(message.content, str) and message.content:
+                    streamed = True
+                    loop.call_soon_threadsafe(chunks.put_nowait, message.content)
+            if not streamed and final and final.get("messages"):
+                loop.call_soon_threadsafe(chunks.put_nowait, final["messages"])
+
+        task = asyncio.ensure_future(self.run(produce))
+        try:
+            while True:
+                get = asyncio.ensure_future(chunks.get())
+                done, _ = await asyncio.wait({get, task}, return_when=asyncio.FIRST_COMPLETED)
+                if get in done:
+                    yield get.result()
+                    continue
+                get.cancel()
+                # Üretici bitti: parçalar tamamlanma bildiriminden önce kuyruğa girmiştir
+                while not chunks.empty():
+                    yield chunks.get_nowait()
+                task.result()
+                return
+        finally:
+            if not task.done():
+                # İstemci gitti; hat arka planda bitirilir, sonucu yok sayılır
+                task.add_done_callback(lambda t: t.exception())
+
+    def stats(self) -> dict:
+        return {"running": self.running, "waiting": self.waiting,
+                "completed": self.completed, "rejected": self.rejected}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
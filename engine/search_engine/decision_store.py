@@ -0,0 +1,163 @@
+import os
+import sys
+import mmap
+import zlib
+import threading
+from typing import Iterable, Tuple
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".dat"
+INDEX_FILE = "index.log"
+
+
+class DecisionStore:
+    """
+    Kararları milyonlarca ayrı .txt dosyası yerine ekleme-yalnız (append-only) segment
+    dosyalarında tutar. index.log her kayıt için bir satır içerir:
+
+        ad \\t segment \\t ofset \\t uzunluk \\t z|r
+
+    Kayıtlar isteğe bağlı olarak zlib ile tek tek sıkıştırılır. Okumalar segmentlerin
+    mmap'i üzerinden yapılır; aynı ad tekrar yazılırsa son kayıt geçerlidir.
+    Aynı anda tek bir yazıcı süreç olduğu varsayılır; okuyucular refresh() ile yeni kayıtları görür.
+    """
+    def __init__(self, path="decisions", compress=True, segment_size=1 << 30):
+        self.path = path
+        self.compress = compress
+        self.segment_size = segment_size
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.maps = {}
+        self.index_pos = 0
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+        segments = [
+            int(f[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for f in os.listdir(path) if f.startswith(SEGMENT_PREFIX) and f.endswith(SEGMENT_SUFFIX)
+        ]
+        self.segment = max(segments, default=0)
+        self.writer = None
+        self.index_writer = None
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{SEGMENT_PREFIX}{segment:05d}{SEGMENT_SUFFIX}")
+
+    def refresh(self):
+        """Başka bir süreç tarafından index.log'a eklenen kayıtları okur."""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with self.lock:
+            with open(index_path, "rb") as f:
+                f.seek(self.index_pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # yarım yazılmış son satır
+                    self.index_pos += len(line)
+                    try:
+                        name, segment, offset, length, codec = line.decode("utf-8").rstrip("\n").split("\t")
+                        self.entries[name] = (int(segment), int(offset), int(length), codec)
+                    except ValueError:
+                        continue
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def names(self):
+        return list(self.entries)
+
+    def location(self, name: str) -> str:
+        """Kaydın depodaki konumu; karar yeniden yazılırsa değişir."""
+        segment, offset, length, _ = self.entries[name]
+        return f"{segment}:{offset}:{length}"
+
+    def put(self, name: str, text: str):
+        data = text.encode("utf-8")
+        codec = "r"
+        if self.compress:
+            data = zlib.compress(data, 6)
+            codec = "z"
+
+        with self.lock:
+            if self.writer is None:
+                self.writer = open(self._segment_path(self.segment), "ab")
+                self.index_writer = open(os.path.join(self.path, INDEX_FILE), "ab")
+            if self.writer.tell() and self.writer.tell() + len(data) > self.segment_size:
+                self.writer.close()
+                self.segment += 1
+                self.writer = open(self._segment_path(self.segment), "ab")
+
+            offset = self.writer.tell()
+            self.writer.write(data)
+            self.writer.flush()
+            # Veri diske yazılmadan indeks satırı yazılmaz; yarım kayıt asla görünmez
+            line = f"{name}\t{self.segment}\t{offset}\t{len(data)}\t{codec}\n".encode("utf-8")
+            self.index_writer.write(line)
+            self.index_writer.flush()
+            self.index_pos += len(line)
+            self.entries[name] = (self.segment, offset, len(data), codec)
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        mm = self.maps.get(segment)
+        if mm is None or len(mm) < end:
+            # Aktif segment büyümüş olabilir; yeniden eşle
+            if mm is not None:
+                mm.close()
+            with open(self._segment_path(segment), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment] = mm
+        return mm
+
+    def read_bytes(self, name: str) -> bytes:
+        entry = self.entries.get(name)
+        if entry is None:
+            self.refresh()
+            entry = self.entries[name]
+        segment, offset, length, codec = entry
+        with self.lock:
+            data = self._map(segment, offset + length)[offset:offset + length]
+        if codec == "z":
+            data = zlib.decompress(data)
+        return data
+
+    def read(self, name: str) -> str:
+        return self.read_bytes(name).decode("utf-8")
+
+    def items(self) -> Iterable[Tuple[str, str]]:
+        # Segment sırasıyla okumak sayfa önbelleğini sıralı kullanır
+        for name, _ in sorted(self.entries.items(), key=lambda item: item[1][:2]):
+            yield name, self.read(name)
+
+    def import_dir(self, directory: str, suffix=".txt") -> int:
+        count = 0
+        for file in os.listdir(directory):
+            if file.endswith(suffix) and file not in self.entries:
+                with open(os.path.join(directory, file), "r", encoding="utf-8") as f:
+                    self.put(file, f.read())
+                count += 1
+        return count
+
+    def close(self):
+        with self.lock:
+            for mm in self.maps.values():
+                mm.close()
+            self.maps.clear()
+            if self.writer is not None:
+                self.writer.close()
+                self.index_writer.close()
+                self.writer = None
+                self.index_writer = None
+
+
+if __name__ == "__main__":
+    # Mevcut courts/*.txt dosyalarını depoya aktar: python -m search_engine.decision_store ./courts ./decisions
+    source_dir = sys.argv[1] if len(sys.argv) > 1 else "./courts"
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else "./decisions"
+    store = DecisionStore(store_dir)
+    imported = store.import_dir(source_dir)
+    store.close()
+    print(f"✅ {imported} karar {store_dir} deposuna aktarıldı.")
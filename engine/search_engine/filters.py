@@ -0,0 +1,209 @@
+import re
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+from search_engine.sentence_metadata import load_metadata, map_sections, write_sections
+
+MAGIC = b"CBFILT01"
+# CourtCase.generate_filename: {daire}_E{esas}_K{karar}_{gg-aa-yyyy}.txt
+FILENAME = re.compile(r"^(?P<daire>[^_]+)_E.*_\d{1,2}-\d{1,2}-(?P<year>\d{4})\.txt$")
+# Seçilen kimlikler index'in bu oranından azsa IDSelectorBatch (hash), değilse bitmap kullanılır
+BATCH_SELECTOR_RATIO = 1 / 64
+# FilterIndex'in sorgular arasında sakladığı birleşik kimlik kümesi / seçici sayısı
+FILTER_CACHE_SIZE = 128
+# İstemcinin gönderebileceği filtre anahtarları
+FILTER_KEYS = frozenset({"daire", "year_from", "year_to"})
+
+
+def normalize_daire(daire: str) -> str:
+    """ "9. Hukuk Dairesi" ve "9HukukDairesi" aynı anahtara düşer (generate_filename'deki temizlik)."""
+    return re.sub(r"[ .]", "", daire).lower()
+
+
+def parse_filename(file: str) -> Optional[Tuple[str, int]]:
+    """Karar dosya adından (daire anahtarı, karar yılı); biçim tanınmazsa None."""
+    match = FILENAME.match(file)
+    if match is None:
+        return None
+    return normalize_daire(match.group("daire")), int(match.group("year"))
+
+
+def validate_filters(filters) -> None:
+    """
+    İstemciden gelen filtre sözlüğünü denetler; yalnızca daire (str ya da str listesi),
+    year_from ve year_to (int) kabul edilir. Bilinmeyen anahtar sessizce yok sayılırsa
+    kullanıcı filtresiz sonuçları filtreli sanır; uymayan filtrede ValueError fırlatır.
+    """
+    if not isinstance(filters, dict):
+        raise ValueError(f"filters bir sözlük olmalı, {type(filters).__name__} verildi")
+    unknown = set(filters) - FILTER_KEYS
+    if unknown:
+        raise ValueError(f"bilinmeyen filtre: {', '.join(sorted(unknown))} "
+                         f"(geçerli olanlar: {', '.join(sorted(FILTER_KEYS))})")
+    daire = filters.get("daire")
+    if daire is not None and not isinstance(daire, str) and not (
+            isinstance(daire, list) and all(isinstance(name, str) for name in daire)):
+        raise ValueError("daire bir metin ya da metin listesi olmalı")
+    for key in ("year_from", "year_to"):
+        year = filters.get(key)
+        # bool da int'in alt sınıfı; True yıl değildir
+        if year is not None and (not isinstance(year, int) or isinstance(year, bool)):
+            raise ValueError(f"{key} bir tamsayı olmalı, {year!r} verildi")
+
+
+def file_matches(file: str, filters: Optional[dict]) -> bool:
+    """Karar dosyası filtreye uyuyor mu; FilterIndex.ids ile aynı kurallar."""
+    if not filters:
+        return True
+    parsed = parse_filename(file)
+    if parsed is None:
+        return False
+    daire_key, year = parsed
+    daire = filters.get("daire")
+    if daire:
+        names = [daire] if isinstance(daire, str) else daire
+        if daire_key not in map(normalize_daire, names):
+            return False
+    year_from, year_to = filters.get("year_from"), filters.get("year_to")
+    return (year_from is None or year >= year_from) and (year_to is None or year <= year_to)
+
+
+def build_filter_index(metadata, path="database/filters.bin") -> Tuple[int, int]:
+    """
+    Her daire ve her karar yılı için o kararlarda geçen cümle kimliklerini (sıralı int64)
+    önceden hesaplayıp tek dosyaya yazar. Tekilleştirilmiş bir cümle, posting listesindeki
+    tüm kararların dairelerine ve yıllarına girer.
+    """
+    by_daire = defaultdict(list)
+    by_year = defaultdict(list)
+    for file, ids in metadata.ids_by_file().items():
+        parsed = parse_filename(file)
+        if parsed is None:
+            continue
+        daire, year = parsed
+        by_daire[daire].append(ids)
+        by_year[year].append(ids)
+
+    def id_set(groups):
+        return np.unique(np.concatenate([np.asarray(ids, dtype="<i8") for ids in groups]))
+
+    sections = [(f"daire:{daire}", id_set(groups)) for daire, groups in sorted(by_daire.items())]
+    sections += [(f"year:{year}", id_set(groups)) for year, groups in sorted(by_year.items())]
+    sections.append(("stats", np.array([len(metadata)], dtype="<i8")))
+    write_sections(path, MAGIC, sections)
+    return len(by_daire), len(by_year)
+
+
+class FilterIndex:
+    """
+    build_filter_index ile yazılmış daire / yıl kimlik kümelerini mmap ile açar. ids() bir
+    filtreye uyan kimlikleri, id_selector() bunları FAISS'e SearchParameters.sel olarak
+    verilecek IDSelector'a çevirir; böylece arama yalnızca ilgili alt kümeyi tarar ve top-k
+    sonradan elenmediği için eksik dönmez.
+
+    Filtre sözlüğü: {"daire": "9. Hukuk Dairesi" | [...], "year_from": 2018, "year_to": 2020}
+
+    Birleşik kümeler ve seçiciler filtre anahtarıyla son cache_size filtre için saklanır;
+    aynı filtreyle gelen sorgular birleştirme ve bitmap maliyetini yeniden ödemez.
+    """
+    def __init__(self, path="database/filters.bin", cache_size: int = FILTER_CACHE_SIZE):
+        self.path = path
+        self.mm, sections = map_sections(path, MAGIC)
+        self.ntotal = int(sections.pop("stats")[0])
+        self.by_daire = {name[len("daire:"):]: ids for name, ids in sections.items() if name.startswith("daire:")}
+        self.by_year = {int(name[len("year:"):]): ids for name, ids in sections.items() if name.startswith("year:")}
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # filtre anahtarı -> {"ids", "selector"}, en eski kullanılan başta
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(filters: dict):
+        daire = filters.get("daire")
+        names = ([daire] if isinstance(daire, str) else daire) if daire else ()
+        return tuple(sorted(set(map(normalize_daire, names)))), filters.get("year_from"), filters.get("year_to")
+
+    def _mask(self, groups) -> np.ndarray:
+        # Kümelerin birleşimi ntotal boyutlu bir maskeyle alınır (np.unique'ten çok daha hızlı)
+        mask = np.zeros(self.ntotal, dtype=bool)
+        for ids in groups:
+            mask[ids] = True
+        return mask
+
+    def _compute(self, daire_keys, year_from, year_to) -> Optional[np.ndarray]:
+        mask = None
+        if daire_keys:
+            mask = self._mask(self.by_daire[key] for key in daire_keys if key in self.by_daire)
+        if year_from is not None or year_to is not None:
+            low = year_from if year_from is not None else min(self.by_year, default=0)
+            high = year_to if year_to is not None else max(self.by_year, default=0)
+            years = self._mask(ids for year, ids in self.by_year.items() if low <= year <= high)
+            mask = years if mask is None else mask & years
+        if mask is None:
+            return None
+        result = np.flatnonzero(mask)
+        result.flags.writeable = False  # sorgular arasında paylaşılır
+        return result
+
+    def _entry(self, filters: dict) -> dict:
+        key = self._key(filters)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                return entry
+        # Birleştirme kilit dışında yapılır; aynı anda gelen iki sorgu aynı kümeyi iki kez hesaplayabilir
+        entry = {"ids": self._compute(*key), "selector": None}
+        with self.lock:
+            entry = self.cache.setdefault(key, entry)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return entry
+
+    def ids(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        """Filtreye uyan sıralı kimlikler (salt okunur); filtre yoksa None (her şey)."""
+        if not filters:
+            return None
+        return self._entry(filters)["ids"]
+
+    def selector(self, filters: Optional[dict]):
+        """ids(filters) için FAISS IDSelector'ı; filtre yoksa None."""
+        if not filters:
+            return None
+        entry = self._entry(filters)
+        if entry["ids"] is None:
+            return None
+        if entry["selector"] is None:
+            entry["selector"] = id_selector(entry["ids"], self.ntotal)
+        return entry["selector"]
+
+    def close(self):
+        self.cache.clear()
+        self.by_daire.clear()
+        self.by_year.clear()
+        self.mm.close()
+
+
+def id_selector(ids: np.ndarray, ntotal: int):
+    """Sıralı kimliklerden IDSelector: küçük kümeler için hash (Batch), büyükler için bitmap."""
+    ids = np.ascontiguousarray(ids, dtype="int64")
+    if len(ids) < ntotal * BATCH_SELECTOR_RATIO:
+        return faiss.IDSelectorBatch(ids)
+    mask = np.zeros(max(ntotal, int(ids[-1]) + 1 if len(ids) else 0), dtype=bool)
+    mask[ids] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(bitmap)
+    selector.referenced_objects = [bitmap]  # bitmap, seçici yaşadıkça serbest bırakılmamalı
+    return selector
+
+
+if __name__ == "__main__":
+    # Metadata'dan daire / yıl filtrelerini kur: python -m search_engine.filters database/metadata.bin database/filters.bin
+    source = sys.argv[1] if len(sys.argv) > 1 else "database/metadata.bin"
+    target = sys.argv[2] if len(sys.argv) > 2 else "database/filters.bin"
+    dairas, years = build_filter_index(load_metadata(source), target)
+    print(f"✅ {dairas} daire ve {years} yıl için kimlik kümeleri {target} dosyasına yazıldı.")
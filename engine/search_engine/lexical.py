@@ -0,0 +1,206 @@
+import re
+import sys
+import hashlib
+from array import array
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from search_engine.sentence_metadata import load_metadata, map_sections, write_sections
+
+MAGIC = b"CBLEX001"
+PREFIX_LEN = 5  # Türkçe ekler için kök yerine ilk 5 harf (F5 gövdeleme)
+K1 = 1.2
+B = 0.75
+
+# Künye gibi sayısal dizileri ("2019/1234", "01.02.2021") tek terim olarak tut
+TOKEN = re.compile(r"\d+(?:[/.]\d+)*|[^\W\d_]+")
+TURKISH_UPPER_I = str.maketrans({"I": "ı", "İ": "i"})
+ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+# Künye sorgusunun tek bir parçası; sorgu parça parça taranır (iç içe niceleyicili tek bir
+# desen eşleşmeyen girdilerde üstel geri izleme yapar)
+CITATION_TOKEN = re.compile(r"\s*(?:esas|karar|sayılı|madde|md\.?|\d+(?:[/.]\d+)*|[EKD]\.?)", re.IGNORECASE)
+
+
+def normalize(text: str) -> str:
+    """Türkçe küçük harfe çevirir (I -> ı, İ -> i) ve aksanları katlar; "İŞ" ile "is" aynı terimdir."""
+    return text.translate(TURKISH_UPPER_I).lower().translate(ASCII_FOLD)
+
+
+def analyze(text: str) -> list:
+    terms = []
+    for token in TOKEN.findall(normalize(text)):
+        terms.append(token if token[0].isdigit() else token[:PREFIX_LEN])
+    return terms
+
+
+def term_key(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def is_citation_query(query: str) -> bool:
+    """Yalnızca esas/karar numarası, madde numarası gibi künyelerden oluşan sorgular."""
+    query = query.strip()
+    pos = 0
+    while pos < len(query):
+        match = CITATION_TOKEN.match(query, pos)
+        if match is None:
+            return False
+        pos = match.end()
+    return any(c.isdigit() for c in query)
+
+
+def build_lexical_index(metadata, path="database/lexical.bin", k1=K1, b=B) -> int:
+    """
+    Metadata'daki canlı cümleler (FAISS kimlikleriyle) üzerinde BM25 ters index'i kurar.
+    Her posting için BM25 katkısı (impact) kurulumda hesaplanıp float16 saklanır; terimler
+    64 bitlik özetlerine göre sıralıdır ve her terimin en yüksek katkısı budama için tutulur.
+    """
+    vocab = {}
+    term_ids = array("i")
+    doc_ids = array("i")
+    tfs = array("f")
+    doc_len = np.zeros(len(metadata), dtype=np.float32)
+    live = 0
+    for i in range(len(metadata)):
+        entry = metadata[i]
+        if entry is None:
+            continue
+        live += 1
+        counts = Counter(analyze(entry[0]))
+        doc_len[i] = sum(counts.values())
+        for term, tf in counts.items():
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            doc_ids.append(i)
+            tfs.append(tf)
+
+    t = np.frombuffer(term_ids, dtype=np.int32)
+    d = np.frombuffer(doc_ids, dtype=np.int32)
+    tf = np.frombuffer(tfs, dtype=np.float32)
+    avgdl = float(doc_len.sum() / max(live, 1))
+    df = np.bincount(t, minlength=len(vocab))
+    idf = np.log1p((live - df + 0.5) / (df + 0.5)).astype(np.float32)
+    impacts = idf[t] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[d] / max(avgdl, 1e-9)))
+
+    hashes = np.fromiter((term_key(term) for term in vocab), dtype=np.uint64, count=len(vocab))
+    term_order = np.argsort(hashes)
+    rank = np.empty_like(term_order)
+    rank[term_order] = np.arange(len(term_order))
+    order = np.lexsort((d, rank[t]))
+    postings = d[order]
+    impacts = impacts[order].astype(np.float16)
+
+    term_offsets = np.zeros(len(vocab) + 1, dtype="<u8")
+    np.cumsum(df[term_order], out=term_offsets[1:])
+    term_max = (np.maximum.reduceat(impacts.astype(np.float32), term_offsets[:-1].astype(np.int64))
+                if len(impacts) else np.zeros(0, dtype=np.float32))
+
+    write_sections(path, MAGIC, [
+        ("term_hashes", hashes[term_order].astype("<u8")),
+        ("term_offsets", term_offsets),
+        ("term_max", term_max.astype("<f4")),
+        ("doc_ids", postings.astype("<i4")),
+        ("impacts", impacts.astype("<f2")),
+        ("stats", np.array([live, avgdl, k1, b], dtype="<f8")),
+    ])
+    return len(vocab)
+
+
+class LexicalIndex:
+    """
+    build_lexical_index ile yazılmış BM25 index'ini mmap ile açar. search(), terimleri en yüksek
+    katkılarına göre azalan sırada işleyen MaxScore budamasıyla top-k döner: işlenmemiş
+    terimlerin katkı toplamı k'ıncı skorun altına düşünce yeni aday alınmaz, kalan (genelde
+    uzun, sık geçen) terimlerin posting listelerine yalnızca mevcut adaylar için ikili aramayla bakılır.
+    """
+    def __init__(self, path="database/lexical.bin"):
+        self.path = path
+        self.mm, sections = map_sections(path, MAGIC)
+        self.term_hashes = sections["term_hashes"]
+        self.term_offsets = sections["term_offsets"]
+        self.term_max = sections["term_max"]
+        self.doc_ids = sections["doc_ids"]
+        self.impacts = sections["impacts"]
+        self.num_docs = int(sections["stats"][0])
+
+    def __len__(self) -> int:
+        return len(self.term_hashes)
+
+    def _lookup(self, term: str):
+        key = np.uint64(term_key(term))
+        j = int(np.searchsorted(self.term_hashes, key))
+        if j < len(self.term_hashes) and self.term_hashes[j] == key:
+            return j
+        return None
+
+    def search(self, query: str, top_k: int = 10, allowed_ids: np.ndarray = None) -> list:
+        """
+        (kimlik, BM25 skoru) listesi döner, skora göre azalan. allowed_ids (sıralı) verilirse
+        yalnızca bu kimlikler aday olur; eşik de bu alt küme üzerinden hesaplanır.
+        """
+        terms = [j for j in {self._lookup(term) for term in analyze(query)} if j is not None]
+        if not terms:
+            return []
+        terms.sort(key=lambda j: -self.term_max[j])
+        # bounds[n]: n'inci terimden sonraki terimlerin alabileceği en yüksek toplam katkı
+        bounds = np.append(np.cumsum(self.term_max[terms][::-1], dtype=np.float64)[::-1][1:], 0.0)
+
+        cand_ids = np.zeros(0, dtype=np.int32)
+        cand_scores = np.zeros(0, dtype=np.float32)
+        threshold = 0.0
+        pruning = False
+        for j, remaining in zip(terms, bounds):
+            start, end = int(self.term_offsets[j]), int(self.term_offsets[j + 1])
+            ids = self.doc_ids[start:end]
+            impacts = self.impacts[start:end]
+
+            if allowed_ids is not None and not pruning:
+                keep = np.isin(ids, allowed_ids, assume_unique=True)
+                ids, impacts = ids[keep], impacts[keep]
+            if not pruning:
+                # Birleşim: yeni adaylar eklenir, ortak olanların skorları toplanır
+                all_ids = np.concatenate([cand_ids, ids])
+                cand_ids, inverse = np.unique(all_ids, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, impacts]),
+                                          minlength=len(cand_ids)).astype(np.float32)
+            else:
+                pos = np.searchsorted(ids, cand_ids)
+                hit = pos < len(ids)
+                hit[hit] = ids[pos[hit]] == cand_ids[hit]
+                cand_scores[hit] += impacts[pos[hit]]
+
+            if len(cand_scores) >= top_k:
+                threshold = float(np.partition(cand_scores, len(cand_scores) - top_k)[len(cand_scores) - top_k])
+            if threshold > 0 and remaining < threshold:
+                # Hiçbir yeni belge artık top-k'ya giremez; ulaşamayacak adaylar da elenir
+                pruning = True
+                keep = cand_scores + remaining >= threshold
+                cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+
+        if len(cand_scores) > top_k:
+            top = np.argpartition(-cand_scores, top_k)[:top_k]
+        else:
+            top = np.arange(len(cand_scores))
+        top = top[np.argsort(-cand_scores[top], kind="stable")]
+        return [(int(cand_ids[i]), float(cand_scores[i])) for i in top]
+
+    def close(self):
+        self.term_hashes = self.term_offsets = self.term_max = self.doc_ids = self.impacts = None
+        self.mm.close()
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60) -> list:
+    """Kimlik sıralamalarını RRF ile birleştirir: skor = Σ 1 / (k + sıra)."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, i in enumerate(ranking, start=1):
+            scores[i] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+if __name__ == "__main__":
+    # Metadata'dan BM25 index'i kur: python -m search_engine.lexical database/metadata.bin database/lexical.bin
+    source = sys.argv[1] if len(sys.argv) > 1 else "database/metadata.bin"
+    target = sys.argv[2] if len(sys.argv) > 2 else "database/lexical.bin"
+    terms = build_lexical_index(load_metadata(source), target)
+    print(f"✅ {terms} terimlik BM25 index'i {target} dosyasına yazıldı.")
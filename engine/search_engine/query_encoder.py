@@ -0,0 +1,184 @@
+import abc
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from search_engine.sentence_metadata import normalize_sentence
+
+DEFAULT_API_URL = "https://mirzabey-bge-m3-api.hf.space/embed"
+
+
+class QueryEncoder(abc.ABC):
+    """
+    Sorgu gömme arka uçlarının ortak tabanı. encode() sorguyu normalize edilmiş metniyle
+    sınırlı bir LRU önbellekte arar; yoksa özgün sorguyla alt sınıfın _encode()'unu çağırır
+    (normalize metin yalnızca önbellek anahtarıdır, modele gitmez). Sonuç (1, d) float32
+    dizidir; gömme alınamazsa None döner (önbelleğe yazılmaz).
+    """
+    def __init__(self, cache_size: int = 10000):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @abc.abstractmethod
+    def _encode(self, text: str) -> Optional[np.ndarray]:
+        """Tek bir sorguyu gömer; alınamazsa None."""
+
+    def encode(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_sentence(query)
+        with self.lock:
+            vector = self.cache.get(key)
+            if vector is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+        vector = self._encode(query)
+        if vector is not None and self.cache_size:
+            with self.lock:
+                self.cache[key] = vector
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return vector
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        pass
+
+
+class RemoteQueryEncoder(QueryEncoder):
+    """
+    Barındırılan gömme API'si ({"text": ...} -> {"embedding": [...]}). Bağlantılar tek bir
+    Session'da havuzlanır; her istek (bağlanma, okuma) zaman aşımıyla sınırlıdır ve geçici
+    sunucu hataları bir kez yeniden denenir, böylece yavaş bir uç nokta isteği asılı bırakmaz.
+    """
+    def __init__(self, api_url: str = DEFAULT_API_URL, timeout=(2.0, 5.0), pool_size: int = 16,
+                 retries: int = 1, cache_size: int = 10000):
+        super().__init__(cache_size)
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _encode(self, text: str) -> Optional[np.ndarray]:
+        try:
+            response = self.session.post(self.api_url, json={"text": text}, timeout=self.timeout)
+            response.raise_for_status()
+            return np.asarray(response.json()["embedding"], dtype="float32")[None, :]
+        except Exception as e:
+            print(f"❌ Embedding API error: {e}")
+            return None
+
+    def close(self):
+        self.session.close()
+
+
+class MicroBatcher:
+    """
+    Eşzamanlı istekleri tek bir arka plan iş parçacığında toplar: ilk istekten sonra en çok
+    max_wait saniye ya da max_batch istek beklenir ve hepsi tek ileri geçişte gömülür.
+    Aynı partideki tekrar eden metinler bir kez gömülür.
+    """
+    def __init__(self, encode_batch, max_batch: int = 32, max_wait: float = 0.005):
+        self.encode_batch = encode_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.thread = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+        self.thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self.queue.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)  # kapanış, bu parti bittikten sonra
+                    break
+                batch.append(item)
+
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.encode_batch(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text][None, :])
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+class LocalQueryEncoder(QueryEncoder):
+    """
+    Aynı BGE-M3 modelini süreç içinde (varsayılan CPU) çalıştırır; ağ gidiş-dönüşü yoktur.
+    Eşzamanlı sorgular MicroBatcher ile tek ileri geçişte gömülür. encoder, index kurarken
+    kullanılan fabrikayla aynıdır (bkz. resolve_encoder).
+    """
+    def __init__(self, encoder=None, device: str = "cpu", max_batch: int = 32, max_wait: float = 0.005,
+                 timeout: float = 10.0, cache_size: int = 10000):
+        super().__init__(cache_size)
+        # vector_database bu modülü içe aktarır; döngüyü kırmak için burada
+        from search_engine.vector_database import get_embedding, resolve_encoder
+        model = resolve_encoder(encoder)(device)
+        self.timeout = timeout
+        self.batcher = MicroBatcher(lambda texts: get_embedding(texts, model, batch_size=max_batch),
+                                    max_batch=max_batch, max_wait=max_wait)
+
+    def _encode(self, text: str) -> Optional[np.ndarray]:
+        try:
+            return self.batcher.submit(text).result(timeout=self.timeout)
+        except Exception as e:
+            print(f"❌ Query embedding error: {e}")
+            return None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        batches = self.batcher.batches
+        stats["batches"] = batches
+        stats["mean_batch"] = self.batcher.items / batches if batches else 0.0
+        return stats
+
+    def close(self):
+        self.batcher.close()
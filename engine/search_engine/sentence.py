@@ -3,6 +3,8 @@ import os
 from tqdm import tqdm
 import json
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from search_engine.decision_store import DecisionStore
 
 def clean_text(text):
     # Replace \n and \t with a space
@@ -45,39 +47,43 @@ def extract_main_body(text):
 
     return "\n".join(main_body_lines).strip()
 
+# Cümle içinde nokta taşıyan ama bölünmemesi gereken kısaltmalar
+ABBREVIATIONS = [
+    "Av.", "Dr.", "Prof.", "Sn.", "Mr.", "Mrs.", "Ms.", "Mah.", "Ltd", "Şti", "Tic", "Müh.",
+    "Ltd.", "Şti.", "Stj.", "Doç.", "Yrd.", "İnş.", "San.", "Tic.",
+    "İth.", "İhr.", "A.Ş.", "K.D.V.", "vs.", "vb.", "Elk.", "Hiz.", "Nak.", "Teks.", "Öz."
+]
+
+# Tek geçişlik tarayıcı: kısaltmalar (uzundan kısaya) olduğu gibi tüketilir, böylece içlerindeki
+# noktalar bölme noktası olamaz; kalan eşleşmeler küçük harf + nokta + boşluk + büyük harf sınırlarıdır.
+# Eski yer tutuculu sürümle aynı sonuç için kısaltmayla başlayan cümlede de bölünmez.
+_ABBREVIATION_ALTERNATION = "|".join(re.escape(a) for a in sorted(set(ABBREVIATIONS), key=len, reverse=True))
+SENTENCE_BOUNDARY = re.compile(
+    _ABBREVIATION_ALTERNATION
+    + r"|(?<=[a-zçğıöşü])(\.)\s+(?=[A-ZÇĞİÖŞÜ])(?!" + _ABBREVIATION_ALTERNATION + ")"
+)
+
+def sentence_spans(text):
+    """
+    Metni kopyalamadan cümlelere ayırır; her cümle için (başlangıç, bitiş) karakter aralığı döner.
+    Bölme noktasındaki nokta ve ardından gelen boşluk hiçbir cümleye dahil edilmez.
+    """
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    spans = []
+    for m in SENTENCE_BOUNDARY.finditer(text, start, end):
+        if m.lastindex:
+            spans.append((start, m.start()))
+            start = m.end()
+    if start < end:
+        spans.append((start, end))
+    return spans
+
 def custom_sentence_tokenize(text):
     # Satır sonlarını düzle
-    text = re.sub(r'\s*\n\s*', ' ', text)
-
-    # Cümle içinde nokta taşıyan ama bölünmemesi gereken kısaltmalar
-    abbreviations = [
-        "Av.", "Dr.", "Prof.", "Sn.", "Mr.", "Mrs.", "Ms.", "Mah.", "Ltd", "Şti", "Tic", "Müh."
-        "Ltd.", "Şti.", "Stj.", "Doç.", "Yrd.", "İnş.", "San.", "Tic."
-        "İth.", "İhr.", "A.Ş.", "K.D.V.", "vs.", "vb.", "Elk.", "Hiz.", "Nak.", "Teks.", "Öz."
-    ]
-
-    # Kısaltmaları geçici olarak koruma altına al
-    placeholder_map = {}
-    for i, abbr in enumerate(abbreviations):
-        placeholder = f"<<ABBR_{i}>>"
-        text = text.replace(abbr, placeholder)
-        placeholder_map[placeholder] = abbr
-
-    # Küçük harf ve nokta ardından büyük harfle başlayan yerlerde böl
-    pattern = r'(?<=[a-zçğıöşü])\.(?=\s+[A-ZÇĞİÖŞÜ])'
-    sentences = re.split(pattern, text)
-
-    # Fazla boşlukları temizle
-    sentences = [s.strip() for s in sentences if s.strip()]
-
-    # Kısaltmaları geri getir
-    restored_sentences = []
-    for s in sentences:
-        for placeholder, abbr in placeholder_map.items():
-            s = s.replace(placeholder, abbr)
-        restored_sentences.append(s)
-
-    return restored_sentences
+    if "\n" in text:
+        text = re.sub(r'\s*\n\s*', ' ', text)
+    return [text[start:end] for start, end in sentence_spans(text)]
 
 def merge_short_sentences(sentences, min_length=20):
     merged = []
@@ -97,28 +103,96 @@ def merge_short_sentences(sentences, min_length=20):
 def add_constant_to_strings(strings, constant):
     return [(s, constant) for s in strings]
 
-if __name__ == "__main__":
-
-    court_path = "./courts"
-    output_path = "./courts_sentence.jsonl"
-
-    for file in tqdm(os.listdir(court_path)):
-        if ".txt" in file:
-            with open(os.path.join(court_path, file), "r", encoding="utf-8") as f:
-                text = f.read()
-                body = extract_main_body(text)
-                body = clean_text(body)
-                sentences = custom_sentence_tokenize(body)
-                sentences = merge_short_sentences(sentences)
-                sentences = add_constant_to_strings(sentences, file)
-
-            with open(output_path, "a", encoding="utf-8") as out_f:
-                for sentence, filename in sentences[:-1]:
-                    item = {
-                        "sentence": sentence,
-                        "file": filename
-                    }
-                    out_f.write(json.dumps(item, ensure_ascii=False) + "\n")
-
-
+def extract_sentences(text):
+    body = extract_main_body(text)
+    body = clean_text(body)
+    sentences = custom_sentence_tokenize(body)
+    sentences = merge_short_sentences(sentences)
+    return sentences[:-1]
+
+# Her işçi süreç depoyu bir kez açar
+_worker_store = None
+
+def _init_worker(store_path):
+    global _worker_store
+    _worker_store = DecisionStore(store_path)
+
+def _process_shard(part_path, names):
+    """Bir parça (shard) kararı işler; çıktıyı büyük tamponla yazar, bitince .done dosyasını bırakır."""
+    count = 0
+    tmp_path = part_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=1 << 22) as out_f:
+        for name, _ in names:
+            for sentence in extract_sentences(_worker_store.read(name)):
+                out_f.write(json.dumps({"sentence": sentence, "file": name}, ensure_ascii=False) + "\n")
+                count += 1
+    os.replace(tmp_path, part_path)
+
+    # Kontrol noktası: bu parçadaki kararlar ve işlendikleri andaki konumları
+    done_path = part_path[:-len(".jsonl")] + ".done"
+    with open(done_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(dict(names), f)
+    os.replace(done_path + ".tmp", done_path)
+    return count
+
+def _load_checkpoints(parts_dir):
+    """Tamamlanmış parçalardan karar -> (parça no, konum) eşlemesini çıkarır; sonraki parça kazanır."""
+    processed = {}
+    part_ids = sorted(
+        int(f[len("part-"):-len(".done")])
+        for f in os.listdir(parts_dir) if f.startswith("part-") and f.endswith(".done")
+    )
+    for part_id in part_ids:
+        with open(os.path.join(parts_dir, f"part-{part_id:05d}.done"), encoding="utf-8") as f:
+            for name, location in json.load(f).items():
+                processed[name] = (part_id, location)
+    return processed, part_ids
+
+def extract_corpus(store_path="./decisions", output_path="./courts_sentence.jsonl", workers=None, shard_size=2000):
+    """
+    Depodaki kararları süreç havuzunda parçalar hâlinde cümlelere ayırır. Yeniden çalıştırmada
+    yalnızca yeni ya da değişmiş (depodaki konumu değişmiş) kararlar işlenir; parçalar her
+    seferinde aynı sırayla tek bir JSONL dosyasında birleştirilir.
+    """
+    parts_dir = output_path + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    store = DecisionStore(store_path)
+    processed, part_ids = _load_checkpoints(parts_dir)
+
+    todo = []
+    for name in sorted(store.names()):
+        if ".txt" not in name:
+            continue
+        location = store.location(name)
+        if name not in processed or processed[name][1] != location:
+            todo.append((name, location))
+
+    next_part = part_ids[-1] + 1 if part_ids else 0
+    shards = [todo[i:i + shard_size] for i in range(0, len(todo), shard_size)]
+    print(f"🔄 {len(todo)} yeni/değişmiş karar, {len(shards)} parça")
+
+    if shards:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store_path,)) as executor:
+            futures = [
+                executor.submit(_process_shard, os.path.join(parts_dir, f"part-{next_part + i:05d}.jsonl"), shard)
+                for i, shard in enumerate(shards)
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="🔄 Parçalar"):
+                future.result()
+
+    # Deterministik birleştirme: parçalar sırayla, her karar yalnızca en son işlendiği parçadan
+    processed, part_ids = _load_checkpoints(parts_dir)
+    owner = {name: part_id for name, (part_id, _) in processed.items() if name in store}
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=1 << 22) as out_f:
+        for part_id in part_ids:
+            with open(os.path.join(parts_dir, f"part-{part_id:05d}.jsonl"), encoding="utf-8") as in_f:
+                for line in in_f:
+                    name = json.loads(line)["file"]
+                    if owner.get(name) == part_id:
+                        out_f.write(line)
+    os.replace(tmp_path, output_path)
+    print(f"✅ {output_path} yazıldı ({len(owner)} karar)")
 
+if __name__ == "__main__":
+    extract_corpus("./decisions", "./courts_sentence.jsonl")
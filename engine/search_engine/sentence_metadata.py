@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import mmap
+import pickle
+import shutil
+import struct
+import hashlib
+import tempfile
+from array import array
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"CBMETA01"
+HEADER = struct.Struct("<8sQ")  # sihirli bayt + JSON bölüm tablosunun uzunluğu
+ALIGN = 8
+DIGEST_SIZE = 16
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Tekilleştirme için: boşluklar tekleştirilir, baş/son boşluk ve noktalar atılır."""
+    return " ".join(sentence.split()).strip(" .")
+
+
+def sentence_key(sentence: str) -> bytes:
+    """Normalize edilmiş cümlenin içerik özeti (16 bayt blake2b)."""
+    return hashlib.blake2b(normalize_sentence(sentence).encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def write_sections(path: str, magic: bytes, sections, tail=None):
+    """
+    Adlandırılmış numpy dizilerini tek dosyaya atomik olarak yazar: sihirli bayt, JSON bölüm
+    tablosu (ad -> [ofset, bayt uzunluğu, dtype]) ve 8 bayta hizalı bölümler. tail verilirse
+    (ad, dosya nesnesi, bayt) olarak en sona bellekte tutulmadan kopyalanır.
+    """
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, data.nbytes, data.dtype.str]
+        position += -(-data.nbytes // ALIGN) * ALIGN
+    if tail is not None:
+        layout[tail[0]] = [position, tail[2], "|u1"]
+    table = json.dumps(layout).encode("utf-8")
+    base = -(-(HEADER.size + len(table)) // ALIGN) * ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(magic, len(table)))
+        f.write(table)
+        for name, data in sections:
+            f.seek(base + layout[name][0])
+            f.write(data.tobytes())
+        if tail is not None:
+            f.seek(base + layout[tail[0]][0])
+            shutil.copyfileobj(tail[1], f, 1 << 22)
+    os.replace(tmp_path, path)
+
+
+def map_sections(path: str, magic: bytes):
+    """write_sections ile yazılmış dosyayı mmap'ler; (mmap, ad -> salt okunur numpy dizisi) döner."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    file_magic, table_len = HEADER.unpack_from(mm, 0)
+    if file_magic != magic:
+        mm.close()
+        raise ValueError(f"{path}: beklenmeyen dosya biçimi")
+    layout = json.loads(mm[HEADER.size:HEADER.size + table_len])
+    base = -(-(HEADER.size + table_len) // ALIGN) * ALIGN
+    sections = {}
+    for name, (offset, nbytes, dtype) in layout.items():
+        dtype = np.dtype(dtype)
+        sections[name] = np.frombuffer(mm, dtype=dtype, count=nbytes // dtype.itemsize, offset=base + offset)
+    return mm, sections
+
+
+class SentenceMetadataWriter:
+    """
+    SentenceMetadata dosyasını akış hâlinde yazar. Cümleler diske geçici bir bloba eklenir;
+    bellekte yalnızca ofsetler, dosya kimlikleri, içerik özetleri, (kimlik, dosya) posting
+    çiftleri, kararların sıralı cümle kimlikleri ve (her karar için bir kez) dosya adları tutulur.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.blob = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+        self.offsets = array("Q", [0])
+        self.file_ids = array("i")
+        self.digests = bytearray()
+        self.posting_ids = array("i")
+        self.posting_files = array("i")
+        self.doc_files = array("i")
+        self.doc_ids = array("i")
+        self.files = {}
+
+    def __len__(self) -> int:
+        return len(self.file_ids)
+
+    def _file_id(self, file: str) -> int:
+        file_id = self.files.get(file)
+        if file_id is None:
+            file_id = self.files[file] = len(self.files)
+        return file_id
+
+    def append(self, entry: Optional[Tuple[str, str]], files: Iterable[str] = (), digest: bytes = None) -> int:
+        """
+        Yeni kimlik ekler ve döner. entry (cümle, temsilci dosya) ya da mezar taşı için None'dır;
+        files cümleyi içeren diğer dosyalardır (temsilci dosya her zaman posting'e eklenir).
+        """
+        i = len(self.file_ids)
+        if entry is None:
+            # Mezar taşı: silinmiş cümle, boş metin, -1 dosya kimliği ve posting yok
+            self.offsets.append(self.offsets[-1])
+            self.file_ids.append(-1)
+            self.digests += bytes(DIGEST_SIZE)
+            return i
+        sentence, file = entry
+        data = sentence.encode("utf-8")
+        self.blob.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        self.file_ids.append(self._file_id(file))
+        self.digests += digest if digest is not None else sentence_key(sentence)
+        self.add_file(i, file)
+        for other in files:
+            self.add_file(i, other)
+        return i
+
+    def add_file(self, i: int, file: str):
+        """Daha önce eklenmiş i kimliğinin posting listesine bir dosya ekler."""
+        self.posting_ids.append(i)
+        self.posting_files.append(self._file_id(file))
+
+    def extend_document(self, file: str, ids: Iterable[int]):
+        """Kararın cümle kimliklerini metindeki sırasıyla ekler; bağlam penceresi bu sıradan okunur."""
+        file_id = self._file_id(file)
+        for i in ids:
+            self.doc_files.append(file_id)
+            self.doc_ids.append(i)
+
+    def extend(self, entries: Iterable[Optional[Tuple[str, str]]]):
+        for entry in entries:
+            self.append(entry)
+
+    def close(self):
+        names = [name.encode("utf-8") for name in self.files]
+        file_offsets = np.zeros(len(names) + 1, dtype="<u8")
+        np.cumsum([len(n) for n in names], out=file_offsets[1:])
+
+        # Posting'ler kimliğe göre gruplanır; aynı (kimlik, dosya) çifti bir kez tutulur
+        n = len(self.file_ids)
+        pairs = np.unique(
+            np.frombuffer(self.posting_ids, dtype="<i4").astype("<i8") << 32
+            | np.frombuffer(self.posting_files, dtype="<i4").astype("<i8")
+        ) if len(self.posting_ids) else np.zeros(0, dtype="<i8")
+        posting_offsets = np.zeros(n + 1, dtype="<u8")
+        np.cumsum(np.bincount(pairs >> 32, minlength=n), out=posting_offsets[1:])
+
+        # Kararların cümle dizileri dosya kimliğine göre gruplanır (karar içi sıra korunur)
+        doc_files = np.frombuffer(self.doc_files, dtype="<i4") if len(self.doc_files) else np.zeros(0, "<i4")
+        doc_ids = np.frombuffer(self.doc_ids, dtype="<i4") if len(self.doc_ids) else np.zeros(0, "<i4")
+        order = np.argsort(doc_files, kind="stable")
+        doc_files, doc_sentences = doc_files[order], doc_ids[order]
+        doc_offsets = np.zeros(len(names) + 1, dtype="<u8")
+        np.cumsum(np.bincount(doc_files, minlength=len(names)), out=doc_offsets[1:])
+        # Her (kimlik, dosya) posting'i için cümlenin o karardaki ilk sırası; kayıt yoksa -1
+        ordinals = np.arange(len(doc_files), dtype="<i8") - doc_offsets[doc_files].astype("<i8")
+        occurrences, first = np.unique(doc_sentences.astype("<i8") << 32 | doc_files.astype("<i8"), return_index=True)
+        where = np.minimum(np.searchsorted(occurrences, pairs), max(len(occurrences) - 1, 0))
+        found = (occurrences[where] == pairs) if len(occurrences) else np.zeros(len(pairs), dtype=bool)
+        posting_ordinals = np.where(found, ordinals[first[where]] if len(occurrences) else -1, -1).astype("<i4")
+
+        sections = [
+            ("offsets", np.frombuffer(self.offsets, dtype="<u8")),
+            ("file_ids", np.frombuffer(self.file_ids, dtype="<i4") if n else np.zeros(0, "<i4")),
+            ("digests", np.frombuffer(bytes(self.digests), dtype="u1")),
+            ("posting_offsets", posting_offsets),
+            ("postings", (pairs & 0xFFFFFFFF).astype("<i4")),
+            ("posting_ordinals", posting_ordinals),
+            ("file_offsets", file_offsets),
+            ("file_blob", np.frombuffer(b"".join(names), dtype="u1")),
+            ("doc_offsets", doc_offsets),
+            ("doc_sentences", doc_sentences.astype("<i4")),
+        ]
+
+        self.blob.seek(0)
+        write_sections(self.path, MAGIC, sections, tail=("sentences", self.blob, self.offsets[-1]))
+        self.blob.close()
+
+
+class SentenceMetadata:
+    """
+    FAISS kimliğinden (cümle, dosya) çiftine giden metadata'nın sütunlu, mmap'lenen hâli.
+    Tek dosyada: birleştirilmiş UTF-8 cümle blobu ve ofset dizisi, tekilleştirilmiş dosya adı
+    tablosu ve cümle başına int32 dosya kimliği. Açılış yalnızca başlığı okur; girdiler
+    kimlikle istendikçe çözülür ve sayfalar süreçler arasında paylaşılır.
+    metadata[i], eski pickle listesi gibi (cümle, temsilci dosya) ya da silinmişse None döner.
+
+    Tekilleştirilmiş index'lerde her kimlik tek bir normalize cümledir; files(i) cümleyi içeren
+    tüm dosyaları (posting listesi), digest(i) içerik özetini verir. Bu bölümler olmayan eski
+    dosyalarda her cümlenin tek dosyası vardır ve özet metinden hesaplanır.
+
+    Her kararın cümle kimlikleri metindeki sırayla, her posting'in de cümlenin o karardaki
+    sırası ile tutulur; context(i) komşu cümleleri kararı yeniden okumadan konumla getirir.
+    """
+    def __init__(self, path="database/metadata.bin"):
+        self.path = path
+        self.mm, self.sections = map_sections(path, MAGIC)
+        self.offsets = self.sections["offsets"]
+        self.file_ids = self.sections["file_ids"]
+        self.file_offsets = self.sections["file_offsets"]
+        self.file_blob = self.sections["file_blob"]
+        self.digests = self.sections.get("digests")
+        self.posting_offsets = self.sections.get("posting_offsets")
+        self.postings = self.sections.get("postings")
+        self.posting_ordinals = self.sections.get("posting_ordinals")
+        self.doc_offsets = self.sections.get("doc_offsets")
+        self.doc_sentences = self.sections.get("doc_sentences")
+        self.sentence_blob = self.sections["sentences"]
+        self._file_index = None
+
+    def __len__(self) -> int:
+        return len(self.file_ids)
+
+    def file_name(self, file_id: int) -> str:
+        start, end = self.file_offsets[file_id], self.file_offsets[file_id + 1]
+        return self.file_blob[start:end].tobytes().decode("utf-8")
+
+    def sentence(self, i: int) -> str:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.sentence_blob[start:end].tobytes().decode("utf-8")
+
+    def __getitem__(self, i: int) -> Optional[Tuple[str, str]]:
+        if i < 0:
+            i += len(self)
+        file_id = self.file_ids[i]
+        if file_id < 0:
+            return None
+        return self.sentence(i), self.file_name(file_id)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def num_files(self) -> int:
+        return len(self.file_offsets) - 1
+
+    def files(self, i: int) -> list:
+        """Cümleyi içeren dosyalar; temsilci dosya ilk sıradadır."""
+        file_id = self.file_ids[i]
+        if file_id < 0:
+            return []
+        if self.postings is None:
+            return [self.file_name(file_id)]
+        others = self.postings[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+        return [self.file_name(file_id)] + [self.file_name(f) for f in others.tolist() if f != file_id]
+
+    def file_id(self, file: str) -> Optional[int]:
+        # İlk çağrı tüm dosya adlarını çözer; sorgu yolunda değil, toplu işlerde (güncelleme) kullanılır
+        if self._file_index is None:
+            self._file_index = {self.file_name(f): f for f in range(self.num_files)}
+        return self._file_index.get(file)
+
+    def document(self, file: str) -> np.ndarray:
+        """Kararın cümle kimlikleri, metindeki sırayla (kayıt yoksa boş)."""
+        file_id = self.file_id(file)
+        if file_id is None or self.doc_offsets is None:
+            return np.zeros(0, dtype="<i4")
+        return self.doc_sentences[self.doc_offsets[file_id]:self.doc_offsets[file_id + 1]]
+
+    def position(self, i: int, file: str = None) -> Optional[Tuple[int, int]]:
+        """(dosya kimliği, cümlenin karardaki sırası); file verilmezse temsilci dosya. Kayıt yoksa None."""
+        if self.posting_ordinals is None or self.file_ids[i] < 0:
+            return None
+        start, end = int(self.posting_offsets[i]), int(self.posting_offsets[i + 1])
+        # Dosya, tüm ad tablosu yerine yalnızca cümlenin (kısa) posting listesinde aranır
+        postings = self.postings[start:end]
+        if file is None or file == self.file_name(self.file_ids[i]):
+            match = np.flatnonzero(postings == self.file_ids[i])
+        else:
+            match = [k for k, f in enumerate(postings) if self.file_name(f) == file]
+        if not len(match):
+            return None
+        ordinal = int(self.posting_ordinals[start + match[0]])
+        return (int(postings[match[0]]), ordinal) if ordinal >= 0 else None
+
+    def context(self, i: int, window: int = 1, file: str = None) -> list:
+        """i'nin karardaki önceki ve sonraki window cümlesiyle birlikte, metindeki sırayla cümleler."""
+        position = self.position(i, file)
+        if position is None:
+            # Sıra kaydı olmayan eski dosyalar: tekilleştirilmemiş düzende aynı karar ardışık kimliklerdedir
+            file_id = self.file_ids[i]
+            ids = [j for j in range(max(i - window, 0), min(i + window + 1, len(self))) if self.file_ids[j] == file_id]
+        else:
+            file_id, ordinal = position
+            start, end = int(self.doc_offsets[file_id]), int(self.doc_offsets[file_id + 1])
+            ids = self.doc_sentences[max(start + ordinal - window, start):min(start + ordinal + window + 1, end)].tolist()
+        return [self.sentence(j) for j in ids]
+
+    def digest(self, i: int) -> bytes:
+        if self.digests is None:
+            return sentence_key(self.sentence(i))
+        return self.digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE].tobytes()
+
+    def ids_by_file(self) -> dict:
+        """Dosya adı -> o dosyada geçen canlı cümle kimlikleri (artan sırada)."""
+        if self.postings is None:
+            ids = np.arange(len(self))
+            file_ids = self.file_ids
+        else:
+            ids = np.repeat(np.arange(len(self)), np.diff(self.posting_offsets).astype("int64"))
+            file_ids = self.postings
+        live = file_ids >= 0
+        ids, file_ids = ids[live], file_ids[live]
+        order = np.argsort(file_ids, kind="stable")
+        ids, file_ids = ids[order], file_ids[order]
+        bounds = np.flatnonzero(np.diff(file_ids)) + 1
+        return {
+            self.file_name(int(group[0])): group_ids.tolist()
+            for group_ids, group in zip(np.split(ids, bounds), np.split(file_ids, bounds))
+            if len(group_ids)
+        }
+
+    def close(self):
+        self.offsets = self.file_ids = self.file_offsets = self.file_blob = None
+        self.digests = self.posting_offsets = self.postings = self.sentence_blob = None
+        self.posting_ordinals = self.doc_offsets = self.doc_sentences = None
+        self.sections.clear()
+        self.mm.close()
+
+    @staticmethod
+    def write(path: str, entries: Iterable[Optional[Tuple[str, str]]]):
+        writer = SentenceMetadataWriter(path)
+        writer.extend(entries)
+        writer.close()
+
+
+def load_metadata(path: str):
+    """Eski metadata.pkl listesini ya da yeni sütunlu dosyayı açar."""
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return SentenceMetadata(path)
+
+
+if __name__ == "__main__":
+    # Mevcut pickle'ı dönüştür: python -m search_engine.sentence_metadata database/metadata.pkl database/metadata.bin
+    source = sys.argv[1] if len(sys.argv) > 1 else "database/metadata.pkl"
+    target = sys.argv[2] if len(sys.argv) > 2 else "database/metadata.bin"
+    entries = load_metadata(source)
+    SentenceMetadata.write(target, entries)
+    print(f"✅ {len(entries)} cümle {target} dosyasına yazıldı ({os.path.getsize(target) / 1e6:.1f} MB).")
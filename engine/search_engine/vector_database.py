@@ -1,10 +1,20 @@
+import os
 import faiss
-import pickle
 import json
+import shutil
+import importlib
+import multiprocessing
 import numpy as np
 from tqdm import tqdm
-from FlagEmbedding import BGEM3FlagModel
-from typing import Iterable, Tuple
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+from search_engine.sentence_metadata import SentenceMetadata, SentenceMetadataWriter, load_metadata, sentence_key
+from search_engine.lexical import build_lexical_index, is_citation_query, reciprocal_rank_fusion
+from search_engine.filters import build_filter_index, file_matches, id_selector
+from search_engine.query_encoder import DEFAULT_API_URL, QueryEncoder, RemoteQueryEncoder
 
 
 
@@ -28,83 +38,590 @@ def sentence_generator(jsonl_path: str) -> Iterable[Tuple[str, str]]:
             except Exception:
                 continue
 
-# FAISS indexleme
+# Filtreye uyan kimlik sayısı bunun altındaysa FAISS yerine float32 vektörler doğrudan taranır
+EXACT_SCAN_LIMIT = 4096
+
+# FAISS index fabrikası: "Flat" (kaba kuvvet), "IVF4096,PQ64" (ters dosya + çarpım nicemleme),
+# "HNSW32,Flat" (graf) gibi faiss.index_factory dizgeleri
+# Flat depolamanın float16 / int8 skaler nicemlemeli karşılıkları (vektör başına 2d / d bayt)
+QUANTIZERS = {"fp16": "SQfp16", "int8": "SQ8"}
+
+def quantized_factory(index_factory: str, quantize: str = None) -> str:
+    """"Flat", "IVF4096,Flat", "HNSW32" gibi dizgelerde float32 depolamayı SQfp16/SQ8 ile değiştirir."""
+    if quantize is None:
+        return index_factory
+    sq = QUANTIZERS[quantize]
+    if index_factory == "Flat":
+        return sq
+    if index_factory.endswith(",Flat"):
+        return index_factory[:-len("Flat")] + sq
+    if index_factory.startswith("HNSW") and "," not in index_factory:
+        return f"{index_factory},{sq}"
+    raise ValueError(f"{index_factory}: yalnızca Flat depolamalı index'ler nicemlenebilir")
+
+def load_vectors(path: str, dim: int):
+    """Yeniden puanlama için diskteki float32 vektörleri (satır = kimlik) mmap ile açar."""
+    if not path or not os.path.exists(path) or not os.path.getsize(path):
+        return None
+    return np.memmap(path, dtype="float32", mode="r").reshape(-1, dim)
+
+def rescore_candidates(query_vec, indices, vectors):
+    """
+    Nicemlenmiş mesafelerle seçilen adayları tam hassasiyetli vektörlerle yeniden sıralar;
+    diskten yalnızca adayların satırları okunur.
+    """
+    valid = indices[(indices >= 0) & (indices < len(vectors))]
+    distances = ((np.asarray(vectors[valid]) - query_vec) ** 2).sum(axis=1)
+    order = np.argsort(distances)
+    return distances[order], valid[order]
+
+def create_index(dim: int, index_factory: str = "Flat", ef_construction: int = None):
+    index = faiss.index_factory(dim, index_factory, faiss.METRIC_L2)
+    hnsw = faiss.downcast_index(index)
+    if ef_construction is not None and isinstance(hnsw, faiss.IndexHNSW):
+        hnsw.hnsw.efConstruction = ef_construction
+    return index
+
+def unwrap_index(index):
+    """IDMap sarmalayıcılarının altındaki asıl index'i döner."""
+    inner = faiss.downcast_index(index)
+    while isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        inner = faiss.downcast_index(inner.index)
+    return inner
+
+def search_parameters(index, nprobe: int = None, ef_search: int = None, sel=None):
+    """
+    Sorgu anında ayarlanan nprobe (IVF) / efSearch (HNSW) değerlerini ve kimlik filtresini
+    (IDSelector) çağrıya özel SearchParameters nesnesine çevirir; paylaşılan index nesnesi
+    değiştirilmez. Yalnızca filtre verilirse index'in kendi nprobe / efSearch değeri korunur.
+    """
+    inner = unwrap_index(index)
+    if isinstance(inner, faiss.IndexIVF) and (nprobe is not None or sel is not None):
+        return faiss.SearchParametersIVF(nprobe=nprobe if nprobe is not None else inner.nprobe, sel=sel)
+    if isinstance(inner, faiss.IndexHNSW) and (ef_search is not None or sel is not None):
+        return faiss.SearchParametersHNSW(efSearch=ef_search if ef_search is not None else inner.hnsw.efSearch, sel=sel)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
+
+# Kalıcı kimlikler: FAISS kimliği = metadata listesindeki sıra. Silinen cümlelerin metadata
+# girdisi None olur (mezar taşı), kimlikler asla yeniden kullanılmaz.
+def has_stable_ids(index) -> bool:
+    # IVF kimlikleri ters listelerde saklanır ve silmede kaymaz; IDMap onu sarmalamamalı,
+    # çünkü IDMap alt index'in kimliklerinin 0..ntotal-1 sırasında kaldığını varsayar
+    return (isinstance(faiss.downcast_index(index), (faiss.IndexIDMap, faiss.IndexIDMap2))
+            or faiss.try_extract_index_ivf(index) is not None)
+
+def with_id_map(index):
+    return index if has_stable_ids(index) else faiss.IndexIDMap2(index)
+
+def ensure_id_map(index):
+    """
+    Eski (IDMap'siz) index'leri kalıcı kimliklere taşır. IVF kimlikleri zaten kalıcıdır;
+    Flat, silmede kimlikleri kaydırdığı için vektörleri yeniden gömmeden IDMap2'ye aktarılır.
+    """
+    if has_stable_ids(index):
+        return index
+    if isinstance(faiss.downcast_index(index), faiss.IndexFlat):
+        mapped = faiss.IndexIDMap2(create_index(index.d, "Flat"))
+        if index.ntotal:
+            mapped.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype="int64"))
+        return mapped
+    return index  # ör. IDMap'siz HNSW: ekleme sıralı, silme yalnızca metadata'da
+
+def add_with_ids(index, vectors, ids):
+    if has_stable_ids(index):
+        index.add_with_ids(vectors, ids)
+    else:
+        # Kimlik desteği olmayan index'te silme hiç yapılmadığından ntotal == len(metadata)
+        assert ids[0] == index.ntotal, "index ve metadata uyumsuz"
+        index.add(vectors)
+
+def remove_ids(index, ids) -> int:
+    """Kimlikleri index'ten siler; HNSW gibi silme desteklemeyen index'lerde 0 döner (mezar taşı)."""
+    if not len(ids):
+        return 0
+    try:
+        return index.remove_ids(np.asarray(ids, dtype="int64"))
+    except RuntimeError:
+        return 0
+
+def remove_orphans(index, n: int) -> int:
+    """
+    Metadata'sı olmayan (kimliği >= n) vektörleri siler. save_index index'i metadata'dan önce
+    yerine koyar; arada çöken bir güncelleme bu kimlikleri bırakır ve sonraki güncelleme aynı
+    kimlikleri yeniden ekleyince IDMap2'de çift girdi oluşurdu.
+    """
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        ids = faiss.vector_to_array(inner.id_map)
+        orphans = ids[ids >= n]
+    elif has_stable_ids(index):
+        return index.remove_ids(faiss.IDSelectorRange(n, np.iinfo("int64").max))  # IVF
+    else:
+        orphans = np.arange(n, index.ntotal)  # kimlik = sıra
+    if len(orphans) and remove_ids(index, orphans) != len(orphans):
+        raise ValueError(f"index'te metadata'sı olmayan {len(orphans)} vektör var ve index silmeyi "
+                         f"desteklemiyor; index'i yeniden kurun")
+    return len(orphans)
+
+def save_index(index, faiss_path: str, metadata: SentenceMetadataWriter):
+    """
+    index ve metadata önce geçici dosyalara yazılıp os.replace ile yerine konur; okuyucular asla
+    yarım dosya görmez. Önce index değiştirilir, böylece arada kalan bir çökme en fazla
+    metadata'sı henüz olmayan (aramada atlanan) yeni kimlikler bırakır; bunlar sonraki
+    güncellemenin başında remove_orphans ile silinir.
+    """
+    faiss.write_index(index, faiss_path + ".tmp")
+    os.replace(faiss_path + ".tmp", faiss_path)
+    metadata.close()
+
+def default_device() -> str:
+    """CUDA varsa "cuda", yoksa (torch kurulu değilse de) "cpu"."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def load_model(device: str = None):
+    # MODEL — FlagEmbedding ile (yalnızca index kurarken gerekir; arama tarafı yüklemez)
+    from FlagEmbedding import BGEM3FlagModel
+    device = device or default_device()
+    model = BGEM3FlagModel('mirzabey/bge-m3-law', devices=device, use_fp16=device != "cpu")
+    print(f"✅ BGE-M3 model yüklendi ({device}).")
+    return model
+
+def resolve_encoder(encoder=None):
+    """
+    Gömme modelini yükleyen fabrikayı döner: None için load_model, "modül:fonksiyon" dizgesi ya da
+    doğrudan çağrılabilir. Fabrika device alır ve encode_corpus(batch, max_length) sunan bir nesne döner.
+    """
+    if encoder is None:
+        return load_model
+    if isinstance(encoder, str):
+        module, _, attr = encoder.partition(":")
+        return getattr(importlib.import_module(module), attr)
+    return encoder
+
+def print_dedup_stats(total: int, unique: int, postings: np.ndarray, metadata, top: int = 5):
+    saved = total - unique
+    print(f"🧬 {total} cümleden {unique} tekil; {saved} tekrar gömülmedi "
+          f"(%{100 * saved / max(total, 1):.1f} tasarruf).")
+    for i in np.argsort(postings)[::-1][:top]:
+        if postings[i] > 1:
+            print(f"   {postings[i]:>8} × {metadata[i][0][:80]}")
+
+def stage_metadata(jsonl_path: str, metadata_path: str, dedup: bool = True):
+    """JSONL'i okuyup (tekilleştirilmiş) metadata'yı yazar; her kimlik gömülecek bir cümledir."""
+    metadata = SentenceMetadataWriter(metadata_path)
+    seen = {}
+    occurrences = array("I")
+    count = 0
+    for sentence, filename in tqdm(sentence_generator(jsonl_path), desc="🔄 Processing"):
+        count += 1
+        if dedup:
+            key = sentence_key(sentence)
+            i = seen.get(key)
+            if i is not None:
+                metadata.add_file(i, filename)
+                metadata.extend_document(filename, (i,))
+                occurrences[i] += 1
+                continue
+            i = seen[key] = metadata.append((sentence, filename), digest=key)
+        else:
+            i = metadata.append((sentence, filename))
+        # Kararın cümle sırası; arama bağlamı komşu cümleleri buradan konumla alır
+        metadata.extend_document(filename, (i,))
+        occurrences.append(1)
+    metadata.close()
+
+    print(f"\n✅ Toplam {count} cümle işlendi.")
+    print_dedup_stats(count, len(occurrences), np.frombuffer(occurrences, dtype="uint32"),
+                      SentenceMetadata(metadata_path))
+
+# Her gömme işçisi modeli bir kez yükler
+_worker_model = None
+
+def _init_encoder(encoder, device, threads):
+    global _worker_model
+    if threads:
+        # Her işçiye çekirdeklerin bir payı; yoksa BLAS/torch iş parçacıkları birbirini ezer
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _worker_model = resolve_encoder(encoder)(device)
+
+def _encode_shard(metadata_path, start, end, shard_path):
+    """[start, end) kimlik aralığındaki cümleleri gömer; vektörler .npy olarak atomik yazılır."""
+    metadata = SentenceMetadata(metadata_path)
+    sentences = [metadata.sentence(i) for i in range(start, end)]
+    metadata.close()
+    vectors = get_embedding(sentences, _worker_model)
+    with open(shard_path + ".tmp", "wb") as f:
+        np.save(f, vectors)
+    os.replace(shard_path + ".tmp", shard_path)
+    return start, end
+
 def build_faiss_in_batches(
     jsonl_path: str,
     batch_size: int = 10000,
     faiss_path: str = "database/faiss.index",
-    metadata_path: str = "database/metadata.pkl"
+    metadata_path: str = "database/metadata.bin",
+    index_factory: str = "Flat",
+    train_size: int = 100000,
+    ef_construction: int = None,
+    dedup: bool = True,
+    device: str = None,
+    workers: int = 0,
+    threads_per_worker: int = None,
+    shards_dir: str = None,
+    encoder=None,
+    quantize: str = None,
+    vectors_path: str = None,
+    lexical_path: str = None,
+    filters_path: str = None
 ):
-    dim = None
+    """
+    JSONL'deki cümleleri gömüp index'i sıfırdan kurar. dedup=True iken normalize edilmiş her
+    cümle (içerik özetiyle) yalnızca bir kez gömülür; tekrarları yalnızca o kimliğin posting
+    listesine dosya olarak eklenir.
+
+    Cümleler batch_size'lık parçalara (shard) bölünür ve her parçanın vektörleri shards_dir'e
+    .npy olarak kaydedilir; yarıda kalan bir kurulum yeniden çalıştırıldığında yalnızca eksik
+    parçalar gömülür. workers > 0 ise parçalar ayrı süreçlerde (ör. device="cpu",
+    threads_per_worker = çekirdek / workers) gömülür. Sonunda parçalar tek index'te birleştirilir.
+    device verilmezse CUDA varsa "cuda", yoksa "cpu" kullanılır.
+
+    quantize="fp16" / "int8" vektörleri index'te float16 / int8 skaler nicemlemeyle saklar;
+    vectors_path verilirse float32 vektörler search_faiss'in yeniden puanlaması için diske yazılır.
+    lexical_path / filters_path verilirse aynı kimliklerle BM25 index'i ve daire / yıl
+    filtreleri de kurulur (bkz. search_hybrid).
+    """
+    index_factory = quantized_factory(index_factory, quantize)
+    device = device or default_device()
+    shards_dir = shards_dir or faiss_path + ".shards"
+    staged_path = os.path.join(shards_dir, "metadata.bin")
+    manifest_path = os.path.join(shards_dir, "manifest.json")
+    stat = os.stat(jsonl_path)
+    manifest = {"jsonl": os.path.abspath(jsonl_path), "size": stat.st_size, "mtime": stat.st_mtime,
+                "batch_size": batch_size, "dedup": dedup}
+
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f)
+    if previous != manifest:
+        # Girdi değişmişse eski parçalar geçersizdir
+        shutil.rmtree(shards_dir, ignore_errors=True)
+        os.makedirs(shards_dir)
+        stage_metadata(jsonl_path, staged_path, dedup)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    metadata = SentenceMetadata(staged_path)
+    total = len(metadata)
+    metadata.close()
+    shards = [
+        (start, min(start + batch_size, total), os.path.join(shards_dir, f"shard-{n:05d}.npy"))
+        for n, start in enumerate(range(0, total, batch_size))
+    ]
+    todo = [shard for shard in shards if not os.path.exists(shard[2])]
+    print(f"🧩 {len(shards)} parçadan {len(shards) - len(todo)} tanesi hazır, {len(todo)} tanesi gömülecek.")
+
+    if todo and workers:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_encoder,
+                                 initargs=(encoder, device, threads_per_worker)) as executor:
+            futures = [executor.submit(_encode_shard, staged_path, start, end, path) for start, end, path in todo]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="🔄 Embedding"):
+                future.result()
+    elif todo:
+        _init_encoder(encoder, device, threads_per_worker)
+        for start, end, path in tqdm(todo, desc="🔄 Embedding"):
+            _encode_shard(staged_path, start, end, path)
+
+    # Birleştirme: eğitim gerekiyorsa tüm parçalardan rastgele train_size vektör, sonra parçalar sırayla eklenir
     index = None
-    metadata = []
+    vectors_file = open(vectors_path + ".tmp", "wb") if vectors_path else None
+    for start, end, path in tqdm(shards, desc="🔗 Merging"):
+        vectors = np.load(path, mmap_mode="r")
+        if vectors_file is not None:
+            np.ascontiguousarray(vectors, dtype="float32").tofile(vectors_file)
+        if index is None:
+            index = with_id_map(create_index(vectors.shape[1], index_factory, ef_construction))
+            if not index.is_trained:
+                # JSONL dosya adına göre sıralı; ilk satırlar yalnızca birkaç daireyi kapsar. Örnek,
+                # tüm parçalardan sabit tohumla rastgele seçilir (yeniden kurulumda aynı merkezler)
+                rows = np.sort(np.random.default_rng(0).choice(total, min(train_size, total), replace=False))
+                sample = []
+                for sample_start, sample_end, sample_path in shards:
+                    picked = rows[np.searchsorted(rows, sample_start):np.searchsorted(rows, sample_end)]
+                    if len(picked):
+                        sample.append(np.load(sample_path, mmap_mode="r")[picked - sample_start])
+                sample = np.vstack(sample)
+                print(f"🎯 {index_factory} index'i {len(sample)} vektörle eğitiliyor...")
+                index.train(sample)
+        index.add_with_ids(np.ascontiguousarray(vectors), np.arange(start, end, dtype="int64"))
 
+    # Önce vektörler ve index, sonra metadata yerine konur (bkz. save_index)
+    if vectors_file is not None:
+        vectors_file.close()
+        os.replace(vectors_path + ".tmp", vectors_path)
+    faiss.write_index(index, faiss_path + ".tmp")
+    os.replace(faiss_path + ".tmp", faiss_path)
+    os.replace(staged_path, metadata_path)
+    shutil.rmtree(shards_dir, ignore_errors=True)
+
+    print(f"📁 FAISS index ({index_factory}): {faiss_path} ({index.ntotal} vektör, "
+          f"{os.path.getsize(faiss_path) / max(index.ntotal, 1):.0f} B/vektör)")
+    print(f"📁 Metadata: {metadata_path}")
+    update_side_indexes(metadata_path, lexical_path, filters_path)
+
+def update_faiss_index(
+    jsonl_path: str,
+    batch_size: int = 10000,
+    faiss_path: str = "database/faiss.index",
+    metadata_path: str = "database/metadata.bin",
+    remove_files: Iterable[str] = (),
+    remove_missing: bool = False,
+    device: str = None,
+    encoder=None,
+    vectors_path: str = None,
+    lexical_path: str = None,
+    filters_path: str = None
+):
+    """
+    Mevcut index'i tam yeniden kurmadan günceller: JSONL'deki yeni kararların cümleleri gömülüp
+    yeni kimliklerle eklenir, cümleleri değişmiş (düzeltilmiş) kararlarınki değiştirilir.
+    Index'te zaten bulunan cümleler yeniden gömülmez, yalnızca posting listesine dosya eklenir;
+    posting listesi boşalan cümleler silinir.
+    remove_files ile verilen kararlar, remove_missing=True ise JSONL'de olmayanlar da silinir.
+    Bir kararın satırlarının JSONL'de ardışık olduğu varsayılır (extract_corpus böyle yazar).
+    vectors_path verilirse yeni vektörler yeniden puanlama dosyasının sonuna eklenir.
+    lexical_path / filters_path verilirse BM25 index'i ve filtreler güncel metadata'dan yeniden kurulur.
+    """
+    index = ensure_id_map(faiss.read_index(faiss_path))
+    metadata = load_metadata(metadata_path)
+    if not isinstance(metadata, SentenceMetadata):
+        raise ValueError(f"{metadata_path}: önce 'python -m search_engine.sentence_metadata' ile dönüştürün")
+    orphans = remove_orphans(index, len(metadata))
+    if orphans:
+        print(f"🧹 Yarıda kalmış bir güncellemeden artakalan {orphans} vektör index'ten silindi.")
+    vectors_file = None
+    if vectors_path:
+        rows = os.path.getsize(vectors_path) // (4 * index.d) if os.path.exists(vectors_path) else 0
+        if rows < len(metadata):
+            raise ValueError(f"{vectors_path}: {rows} vektör var, metadata {len(metadata)} kimlik içeriyor")
+        vectors_file = open(vectors_path, "ab")
+        # Yarıda kalmış bir güncellemeden artakalan satırlar atılır
+        vectors_file.truncate(len(metadata) * 4 * index.d)
+
+    file_ids = metadata.ids_by_file()
+    seen = {metadata.digest(i): i for i in np.flatnonzero(metadata.file_ids >= 0).tolist()}
+
+    # Mevcut kimliklerin posting değişiklikleri; yeni kimlikler new_entries'te tutulur
+    dropped = defaultdict(set)
+    attached = defaultdict(list)
+    new_entries = []
+    new_files = defaultdict(list)
+
+    # Güncel kararların cümle dizileri; işlenmeyen kararlarınki eski metadata'dan kopyalanır
+    documents = {}
+
+    def drop(filename):
+        documents.pop(filename, None)
+        for i in file_ids.pop(filename, ()):
+            dropped[i].add(filename)
+
+    for filename in remove_files:
+        drop(filename)
+
+    model = None
     batch_sentences = []
-    batch_meta = []
+    batch_ids = []
+    processed = set()
+    added = replaced = unchanged = total = 0
 
-    gen = sentence_generator(jsonl_path)
-    count = 0
-# MODEL — FlagEmbedding ile
-    model = BGEM3FlagModel('mirzabey/bge-m3-law', devices="mps", use_fp16=True)
-    print("✅ BGE-M3 model yüklendi.")
-    for sentence, filename in tqdm(gen, desc="🔄 Processing"):
-        batch_sentences.append(sentence)
-        batch_meta.append((sentence, filename))
-        count += 1
+    def flush():
+        nonlocal model
+        if model is None:
+            model = resolve_encoder(encoder)(device or default_device())
+        embeddings = get_embedding(batch_sentences, model)
+        if vectors_file is not None:
+            # Yeni kimlikler ardışıktır ve metadata'nın sonundan başlar; satır = kimlik
+            embeddings.tofile(vectors_file)
+            vectors_file.flush()
+        add_with_ids(index, embeddings, np.array(batch_ids, dtype="int64"))
+        batch_sentences.clear()
+        batch_ids.clear()
 
+    for filename, group in tqdm(groupby(sentence_generator(jsonl_path), key=lambda item: item[1]), desc="🔄 Updating"):
+        sentences = {}
+        keys = []
+        for sentence, _ in group:
+            keys.append(sentence_key(sentence))
+            sentences.setdefault(keys[-1], sentence)
+        processed.add(filename)
+        old_ids = file_ids.get(filename)
+        if old_ids is not None:
+            if {metadata.digest(i) for i in old_ids} == sentences.keys():
+                # Yalnızca sırası değişmiş kararda da kimlikler aynı kalır; dizi yeniden yazılır
+                documents[filename] = array("i", (seen[key] for key in keys))
+                unchanged += 1
+                continue
+            drop(filename)
+            replaced += 1
+        else:
+            added += 1
+
+        for key, sentence in sentences.items():
+            total += 1
+            i = seen.get(key)
+            if i is None:
+                i = seen[key] = len(metadata) + len(new_entries)
+                new_entries.append((sentence, filename, key))
+                batch_ids.append(i)
+                batch_sentences.append(sentence)
+            elif i >= len(metadata):
+                new_files[i].append(filename)
+            elif filename in dropped.get(i, ()):
+                dropped[i].discard(filename)  # düzeltilmiş kararda da geçen cümle
+            else:
+                attached[i].append(filename)
+        documents[filename] = array("i", (seen[key] for key in keys))
         if len(batch_sentences) >= batch_size:
-            embeddings = get_embedding(batch_sentences, model)
-            if index is None:
-                dim = embeddings.shape[1]
-                index = faiss.IndexFlatL2(dim)
-            index.add(embeddings)
-            metadata.extend(batch_meta)
-            batch_sentences.clear()
-            batch_meta.clear()
+            flush()
 
     if batch_sentences:
-        embeddings = get_embedding(batch_sentences, model)
-        if index is None:
-            dim = embeddings.shape[1]
-            index = faiss.IndexFlatL2(dim)
-        index.add(embeddings)
-        metadata.extend(batch_meta)
+        flush()
 
-    faiss.write_index(index, faiss_path)
-    with open(metadata_path, "wb") as f:
-        pickle.dump(metadata, f)
+    if remove_missing:
+        for filename in list(file_ids):
+            if filename not in processed:
+                drop(filename)
 
-    print(f"\n✅ Toplam {count} cümle işlendi.")
-    print(f"📁 FAISS index: {faiss_path}")
-    print(f"📁 Metadata: {metadata_path}")
+    writer = SentenceMetadataWriter(metadata_path)
+    stale = []
+    for i in range(len(metadata)):
+        entry = metadata[i]
+        if entry is None:
+            writer.append(None)
+            continue
+        files = metadata.files(i)
+        if i in dropped or i in attached:
+            files = [f for f in files if f not in dropped.get(i, ())] + attached.get(i, [])
+            if not files:
+                stale.append(i)
+                writer.append(None)
+                continue
+        # Temsilci dosya silinmişse sıradaki dosya temsilci olur
+        writer.append((entry[0], files[0]), files[1:], metadata.digest(i))
+    for i, (sentence, filename, key) in enumerate(new_entries, start=len(metadata)):
+        writer.append((sentence, filename), new_files.get(i, ()), key)
+    for filename, ids in documents.items():
+        writer.extend_document(filename, ids)
+    for filename in file_ids:
+        if filename not in documents:
+            writer.extend_document(filename, metadata.document(filename).tolist())
+    removed = remove_ids(index, stale)
 
+    if vectors_file is not None:
+        vectors_file.close()
+    save_index(index, faiss_path, writer)
 
+    print(f"\n✅ {added} yeni, {replaced} değişmiş, {unchanged} aynı karar.")
+    print(f"🧬 {total} cümleden {len(new_entries)} tanesi gömüldü, {total - len(new_entries)} mevcut cümleye bağlandı.")
+    print(f"🗑️ {len(stale)} cümle silindi ({removed} index'ten, {len(stale) - removed} mezar taşı).")
+    print(f"📁 FAISS index: {faiss_path} ({index.ntotal} vektör)")
+    update_side_indexes(metadata_path, lexical_path, filters_path)
 
-import requests
 
-def get_remote_embedding(query: str, api_url="https://mirzabey-bge-m3-api.hf.space/embed") -> list:
-    try:
-        response = requests.post(api_url, json={"text": query})
-        response.raise_for_status()
-        data = response.json()
-        return [data["embedding"]]
-    except Exception as e:
-        print(f"❌ Embedding API error: {e}")
-        return []
+def update_side_indexes(metadata_path: str, lexical_path: str = None, filters_path: str = None):
+    """Metadata kimliklerine bağlı BM25 index'ini ve daire / yıl filtrelerini yeniden kurar."""
+    if not lexical_path and not filters_path:
+        return
+    metadata = SentenceMetadata(metadata_path)
+    if lexical_path:
+        terms = build_lexical_index(metadata, lexical_path)
+        print(f"📁 BM25 index: {lexical_path} ({terms} terim)")
+    if filters_path:
+        dairas, years = build_filter_index(metadata, filters_path)
+        print(f"📁 Filtreler: {filters_path} ({dairas} daire, {years} yıl)")
+    metadata.close()
+
+
+
+# Sorgu kodlayıcısı verilmeyen aramalar için URL başına paylaşılan uzak kodlayıcı
+_remote_encoders = {}
+
+def default_query_encoder(api_url: str = DEFAULT_API_URL) -> QueryEncoder:
+    encoder = _remote_encoders.get(api_url)
+    if encoder is None:
+        encoder = _remote_encoders.setdefault(api_url, RemoteQueryEncoder(api_url))
+    return encoder
+
+def search_result(metadata, i, filters: dict = None) -> Optional[dict]:
+    """
+    Kimliği sonuç sözlüğüne çevirir; geçersiz kimlik ya da silinmiş cümle için None.
+    filters verilirse file, cümleyi içeren kararlardan filtreye uyan ilkidir.
+    """
+    i = int(i)
+    if i < 0 or i >= len(metadata) or metadata[i] is None:
+        return None
+    sentence, file = metadata[i]
+    files = metadata.files(i) if isinstance(metadata, SentenceMetadata) else [file]
+    if filters:
+        # Temsilci dosya başka bir daireden / yıldan olabilir; künye ve bağlam uyan karardan alınır
+        file = next((f for f in files if file_matches(f, filters)), file)
+    return {
+        "id": i,
+        "sentence": sentence,
+        "file": file,
+        # Tekilleştirilmiş cümle birden çok kararda geçebilir; file temsilcidir
+        "files": files,
+    }
+
 
 def search_faiss(
     query,
     index,
     metadata,
     top_k: int = 10,
-    embedding_api_url: str = "https://mirzabey-bge-m3-api.hf.space/embed"
+    embedding_api_url: str = DEFAULT_API_URL,
+    nprobe: int = None,
+    ef_search: int = None,
+    vectors=None,
+    rescore: int = 0,
+    allowed_ids: np.ndarray = None,
+    query_encoder: QueryEncoder = None,
+    filters: dict = None,
+    selector=None,
+    query_vector=None
 ):
-    # FAISS index ve metadata yükle
+    """
+    Sorgu query_encoder ile gömülür (bkz. query_encoder); verilmezse embedding_api_url'deki uzak
+    API havuzlanmış bağlantı ve zaman aşımıyla kullanılır. query_vector verilirse (ör. anlamsal
+    önbelleğin hesapladığı gömme) sorgu yeniden gömülmez.
+    allowed_ids (sıralı kimlikler, bkz. FilterIndex.ids) verilirse arama yalnızca bu alt
+    kümede yapılır: küçük kümeler float32 vektörlerle doğrudan taranır, diğerleri FAISS'e
+    IDSelector olarak verilir (selector verilirse o kullanılır, bkz. FilterIndex.selector);
+    filters (allowed_ids'i üreten filtre) sonuçların dosyasını seçer.
+    """
+    if allowed_ids is not None and not len(allowed_ids):
+        return []
 
 
     # Embed sorgusu
-    query_vec = get_remote_embedding(query, api_url=embedding_api_url)
-    if not query_vec:
+    query_vec = query_vector
+    if query_vec is None:
+        query_vec = (query_encoder or default_query_encoder(embedding_api_url)).encode(query)
+    if query_vec is None:
         print("❌ Query için embedding alınamadı.")
         return []
 
@@ -112,18 +629,77 @@ def search_faiss(
     query_vec = np.array(query_vec).astype("float32")
 
     # FAISS arama
-    distances, indices = index.search(query_vec, top_k)
+    if allowed_ids is not None and vectors is not None and len(allowed_ids) <= EXACT_SCAN_LIMIT:
+        # Seçici filtre: alt kümenin tamamı tam hassasiyetle taranır, ANN atlanır
+        distances, indices = rescore_candidates(query_vec[0], allowed_ids, vectors)
+    else:
+        if selector is None and allowed_ids is not None:
+            selector = id_selector(allowed_ids, len(metadata))
+        params = search_parameters(index, nprobe=nprobe, ef_search=ef_search, sel=selector)
+        # Nicemlenmiş index'te top_k * rescore aday alınıp float32 vektörlerle yeniden sıralanır
+        rescoring = rescore > 1 and vectors is not None
+        distances, indices = index.search(query_vec, top_k * rescore if rescoring else top_k, params=params)
+        distances, indices = distances[0], indices[0]
+        if rescoring:
+            distances, indices = rescore_candidates(query_vec[0], indices, vectors)
 
     results = []
-    for i, dist in zip(indices[0], distances[0]):
-        sentence, file = metadata[i]
-        results.append({
-            "sentence": sentence,
-            "file": file,
-            "distance": float(dist)
-        })
+    for i, dist in zip(indices, distances):
+        if len(results) == top_k:
+            break
+        result = search_result(metadata, i, filters)
+        if result is None:
+            continue  # IVF/HNSW top_k'dan az sonuç döndürebilir; silinen cümleler atlanır
+        result["distance"] = float(dist)
+        results.append(result)
 
     return results
 
 
+def search_hybrid(
+    query,
+    index,
+    metadata,
+    lexical=None,
+    top_k: int = 10,
+    mode: str = "auto",
+    candidates: int = 50,
+    rrf_k: int = 60,
+    allowed_ids: np.ndarray = None,
+    filters: dict = None,
+    **dense_kwargs
+):
+    """
+    BM25 (lexical) ve yoğun (FAISS) aramayı birleştirir. mode:
+      "dense"   yalnızca search_faiss,
+      "lexical" yalnızca BM25; gömme isteği yapılmaz,
+      "hybrid"  iki taraftan candidates'er aday alınıp RRF (k=rrf_k) ile birleştirilir,
+      "auto"    yalnızca künyeden oluşan sorgular ("2019/1234 E.") lexical, diğerleri hybrid.
+    Sonuçlar search_faiss'inkiyle aynı alanları taşır; distance yerine score (RRF ya da BM25) verilir.
+    allowed_ids (bkz. FilterIndex.ids) her iki aramayı da aynı alt kümeyle sınırlar; filters
+    verilirse her sonucun dosyası filtreye uyan karardır.
+    """
+    if lexical is None or mode == "dense":
+        return search_faiss(query, index, metadata, top_k=top_k, allowed_ids=allowed_ids, filters=filters,
+                            **dense_kwargs)
+    if mode == "auto":
+        mode = "lexical" if is_citation_query(query) else "hybrid"
+
+    if mode == "lexical":
+        ranked = lexical.search(query, top_k=candidates, allowed_ids=allowed_ids)
+    else:
+        lexical_ids = [i for i, _ in lexical.search(query, top_k=candidates, allowed_ids=allowed_ids)]
+        dense_ids = [r["id"] for r in search_faiss(query, index, metadata, top_k=candidates,
+                                                   allowed_ids=allowed_ids, **dense_kwargs)]
+        ranked = reciprocal_rank_fusion([lexical_ids, dense_ids], k=rrf_k)
 
+    results = []
+    for i, score in ranked:
+        if len(results) == top_k:
+            break
+        result = search_result(metadata, i, filters)
+        if result is None:
+            continue  # BM25 index'i son güncellemeden eski olabilir; silinen cümleler atlanır
+        result["score"] = float(score)
+        results.append(result)
+    return results
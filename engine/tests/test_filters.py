@@ -0,0 +1,31 @@
+import pytest
+
+from search_engine.filters import file_matches, validate_filters
+
+
+def test_valid_filters():
+    validate_filters({})
+    validate_filters({"daire": "9. Hukuk Dairesi", "year_from": 2018, "year_to": 2020})
+    validate_filters({"daire": ["9. Hukuk Dairesi", "3. Hukuk Dairesi"], "year_to": None})
+
+
+@pytest.mark.parametrize("filters", [
+    {"year_from": "2018"},
+    {"year_to": 2020.0},
+    {"year_from": True},
+    {"chamber": "9. Hukuk Dairesi"},
+    {"year": 2018},
+    {"daire": 9},
+    {"daire": ["9. Hukuk Dairesi", 3]},
+    ["daire"],
+])
+def test_invalid_filters(filters):
+    with pytest.raises(ValueError):
+        validate_filters(filters)
+
+
+def test_file_matches():
+    file = "9HukukDairesi_E2019-1_K2020-2_01-02-2020.txt"
+    assert file_matches(file, {"daire": "9. Hukuk Dairesi", "year_from": 2020})
+    assert not file_matches(file, {"daire": ["3. Hukuk Dairesi"]})
+    assert not file_matches(file, {"year_to": 2019})
@@ -0,0 +1,20 @@
+import time
+
+from search_engine.lexical import is_citation_query
+
+
+def test_citation_queries():
+    assert is_citation_query("E. 2019/1234 K. 2020/567")
+    assert is_citation_query("esas 2019/1234 karar 2020/5")
+    assert not is_citation_query("4857 sayılı kanun madde 18")
+    assert is_citation_query("4857 sayılı md. 18")
+    assert not is_citation_query("kıdem tazminatı")
+    assert not is_citation_query("E. K.")
+
+
+def test_citation_query_does_not_backtrack():
+    # İç içe niceleyicili eski desen burada saniyelerce (her rakamda iki katı) sürüyordu
+    start = time.perf_counter()
+    assert not is_citation_query("1" * 5000 + "!")
+    assert not is_citation_query("1 " * 5000 + "!")
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from search_engine.query_encoder import QueryEncoder
+
+
+class RecordingEncoder(QueryEncoder):
+    def __init__(self):
+        super().__init__(cache_size=2)
+        self.texts = []
+
+    def _encode(self, text):
+        self.texts.append(text)
+        return np.full((1, 4), len(self.texts), dtype="float32")
+
+
+def test_subclass_without_encode_hook_cannot_be_created():
+    class Incomplete(QueryEncoder):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_model_sees_original_query_and_cache_uses_normalized_key():
+    encoder = RecordingEncoder()
+    first = encoder.encode("  kıdem   tazminatı. ")
+    second = encoder.encode("kıdem tazminatı")
+    assert encoder.texts == ["  kıdem   tazminatı. "]
+    assert second is first
+    assert encoder.stats()["hits"] == 1
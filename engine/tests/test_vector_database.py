@@ -0,0 +1,32 @@
+import os
+
+import faiss
+import numpy as np
+
+from benchmarks.embedding_build import write_corpus
+from search_engine.vector_database import build_faiss_in_batches
+
+
+def build(work_dir, jsonl_path, workers):
+    faiss_path = os.path.join(work_dir, f"faiss-{workers}.index")
+    build_faiss_in_batches(
+        jsonl_path, batch_size=100, faiss_path=faiss_path,
+        metadata_path=os.path.join(work_dir, f"metadata-{workers}.bin"),
+        device="cpu", workers=workers, threads_per_worker=1,
+        encoder="benchmarks.embedding_build:stand_in_encoder",
+    )
+    index = faiss.read_index(faiss_path)
+    ids = faiss.vector_to_array(index.id_map)
+    return ids, index.index.reconstruct_n(0, index.ntotal)
+
+
+def test_parallel_build_matches_single_process(tmp_path):
+    jsonl_path = str(tmp_path / "sentences.jsonl")
+    write_corpus(jsonl_path, 650)
+
+    single_ids, single_vectors = build(str(tmp_path), jsonl_path, workers=0)
+    parallel_ids, parallel_vectors = build(str(tmp_path), jsonl_path, workers=2)
+
+    assert len(single_ids) > 100  # birden çok parça
+    np.testing.assert_array_equal(parallel_ids, single_ids)
+    np.testing.assert_allclose(parallel_vectors, single_vectors, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,158 @@
+import time
+import sqlite3
+import threading
+from typing import Iterable, Iterator, List, Tuple
+
+PENDING = "pending"
+FETCHED = "fetched"
+FAILED = "failed"
+
+CaseRow = Tuple[str, str, str, str, str]  # id, daire, esas_no, karar_no, karar_tarihi
+# pending() satırları bu büyüklükteki sayfalarla okur
+PENDING_BATCH = 10000
+
+
+def parse_karar_tarihi(karar_tarihi: str) -> int:
+    """'dd.mm.yyyy' biçimindeki tarihi sıralanabilir yyyymmdd tamsayısına çevirir (hatalıysa 0)."""
+    try:
+        day, month, year = karar_tarihi.split(".")
+        return int(year) * 10000 + int(month) * 100 + int(day)
+    except (AttributeError, ValueError):
+        return 0
+
+
+class FetchManifest:
+    """
+    Karar id'si ile anahtarlanmış, kalıcı çekim kaydı (SQLite).
+    Her kararın pending / fetched / failed durumunu ve hangi sayfa dosyalarının
+    işlendiğini tutar; yeniden başlatma courts/ dizinini taramadan devam eder.
+    """
+    def __init__(self, path="fetch_manifest.sqlite3"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cases (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                daire TEXT NOT NULL,
+                esas_no TEXT NOT NULL,
+                karar_no TEXT NOT NULL,
+                karar_tarihi TEXT NOT NULL,
+                karar_date INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS cases_status ON cases(status, karar_date);
+            CREATE TABLE IF NOT EXISTS sources (
+                name TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(cases)")}
+        if "karar_date" not in columns:
+            # karar_date sütunundan önce oluşturulmuş manifest'leri yerinde güncelle
+            self.conn.execute("ALTER TABLE cases ADD COLUMN karar_date INTEGER NOT NULL DEFAULT 0")
+            rows = self.conn.execute("SELECT id, karar_tarihi FROM cases").fetchall()
+            self.conn.executemany(
+                "UPDATE cases SET karar_date = ? WHERE id = ?",
+                [(parse_karar_tarihi(tarih), case_id) for case_id, tarih in rows],
+            )
+        self.conn.commit()
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM cases LIMIT 1").fetchone() is None
+
+    def is_source_ingested(self, name: str, mtime: float, size: int) -> bool:
+        with self.lock:
+            row = self.conn.execute("SELECT mtime, size FROM sources WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == mtime and row[1] == size
+
+    def add_cases(self, cases: Iterable[Tuple[CaseRow, str]], source=None, fetched_filenames=frozenset()):
+        """(satır, dosya adı) çiftlerini ekler; zaten kayıtlı id'lere dokunmaz."""
+        now = time.time()
+        rows = [
+            (*row, parse_karar_tarihi(row[4]), filename, FETCHED if filename in fetched_filenames else PENDING, now)
+            for row, filename in cases
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO cases "
+                "(id, daire, esas_no, karar_no, karar_tarihi, karar_date, filename, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if source is not None:
+                self.conn.execute("INSERT OR REPLACE INTO sources (name, mtime, size) VALUES (?, ?, ?)", source)
+            self.conn.commit()
+
+    def pending(self, include_failed=True, batch_size=PENDING_BATCH) -> Iterator[CaseRow]:
+        """
+        Bekleyen kararları karar tarihine göre üretir. Satırlar (karar_date, rowid) üzerinden
+        batch_size'lık sayfalarla okunur; liste belleğe alınmaz ve okuma sırasında işaretlenen
+        kararlar sayfaları kaydırmaz.
+        """
+        statuses = (PENDING, FAILED) if include_failed else (PENDING,)
+        placeholders = ", ".join("?" for _ in statuses)
+        last_date, last_rowid = -1, -1
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT karar_date, rowid, id, daire, esas_no, karar_no, karar_tarihi FROM cases "
+                    f"WHERE status IN ({placeholders}) AND (karar_date > ? OR (karar_date = ? AND rowid > ?)) "
+                    f"ORDER BY karar_date, rowid LIMIT ?",
+                    (*statuses, last_date, last_date, last_rowid, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield row[2:]
+            if len(rows) < batch_size:
+                return
+            last_date, last_rowid = rows[-1][0], rows[-1][1]
+
+    def count_pending(self, include_failed=True) -> int:
+        statuses = (PENDING, FAILED) if include_failed else (PENDING,)
+        placeholders = ", ".join("?" for _ in statuses)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM cases WHERE status IN ({placeholders})",
+                                     statuses).fetchone()[0]
+
+    def known_ids(self, case_ids: List[str]) -> set:
+        """Verilen id'lerden manifest'te zaten kayıtlı olanları döndürür."""
+        if not case_ids:
+            return set()
+        placeholders = ", ".join("?" for _ in case_ids)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT id FROM cases WHERE id IN ({placeholders})", list(case_ids)).fetchall()
+        return {row[0] for row in rows}
+
+    def is_fetched(self, case_id: str) -> bool:
+        with self.lock:
+            row = self.conn.execute("SELECT status FROM cases WHERE id = ?", (case_id,)).fetchone()
+        return row is not None and row[0] == FETCHED
+
+    def _set_status(self, case_id: str, status: str):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE cases SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (status, time.time(), case_id),
+            )
+            self.conn.commit()
+
+    def mark_fetched(self, case_id: str):
+        self._set_status(case_id, FETCHED)
+
+    def mark_failed(self, case_id: str):
+        self._set_status(case_id, FAILED)
+
+    def counts(self) -> dict:
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM cases GROUP BY status").fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
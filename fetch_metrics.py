@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Gecikme histogramı kova üst sınırları (saniye)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, float("inf"))
+
+
+def failure_reason(e: Exception) -> str:
+    """İstek istisnasını kaba bir hata kategorisine çevirir."""
+    if isinstance(e, requests.Timeout):
+        return "timeout"
+    if isinstance(e, requests.exceptions.ProxyError):
+        return "proxy"
+    if isinstance(e, requests.ConnectionError):
+        return "connection"
+    if isinstance(e, ValueError):
+        return "bad_json"
+    return "other"
+
+
+def status_reason(status_code: int) -> str:
+    if status_code == 429:
+        return "http_429"
+    if status_code >= 500:
+        return "http_5xx"
+    return "http_other"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": {("+Inf" if b == float("inf") else str(b)): c for b, c in zip(LATENCY_BUCKETS, self.counts)},
+        }
+
+
+class FetchMetrics:
+    """
+    CourtFetcher, ProxyPool ve PageFetcher'ın paylaştığı hafif sayaçlar: istek/bayt sayıları,
+    proxy başına gecikme histogramları, kategoriye göre hatalar, ağ ve ayrıştırma süreleri.
+    Kuyruk derinliği gibi anlık değerler register_gauge ile çağrılabilir olarak eklenir.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.bytes = 0
+        self.docs = 0
+        self.failures = Counter()
+        self.latency = {}
+        self.network_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.gauges = {}
+        self.last_snapshot = (self.started, 0, 0)
+
+    def record_request(self, key: str, latency: float, nbytes: int = 0, reason: str = None):
+        with self.lock:
+            self.requests += 1
+            self.bytes += nbytes
+            self.network_seconds += latency
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.observe(latency)
+            if reason is not None:
+                self.failures[reason] += 1
+
+    def record_failure(self, reason: str):
+        with self.lock:
+            self.failures[reason] += 1
+
+    def record_parse(self, seconds: float):
+        with self.lock:
+            self.parse_seconds += seconds
+            self.docs += 1
+
+    def register_gauge(self, name: str, func):
+        self.gauges[name] = func
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self.lock:
+            last_time, last_requests, last_bytes = self.last_snapshot
+            interval = max(now - last_time, 1e-9)
+            uptime = max(now - self.started, 1e-9)
+            busy = self.network_seconds + self.parse_seconds
+            snapshot = {
+                "timestamp": now,
+                "uptime": uptime,
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "docs_parsed": self.docs,
+                "requests_per_sec": self.requests / uptime,
+                "bytes_per_sec": self.bytes / uptime,
+                "recent_requests_per_sec": (self.requests - last_requests) / interval,
+                "recent_bytes_per_sec": (self.bytes - last_bytes) / interval,
+                "failures": dict(self.failures),
+                "time": {
+                    "network_seconds": self.network_seconds,
+                    "parse_seconds": self.parse_seconds,
+                    "parse_share": self.parse_seconds / busy if busy else 0.0,
+                },
+                "latency": {key: h.to_dict() for key, h in self.latency.items()},
+            }
+            self.last_snapshot = (now, self.requests, self.bytes)
+
+        gauges = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        snapshot["gauges"] = gauges
+        return snapshot
+
+
+class MetricsReporter(threading.Thread):
+    """Belirli aralıklarla JSON anlık görüntüsünü dosyaya (atomik olarak) yazar."""
+    def __init__(self, metrics: FetchMetrics, path="fetch_metrics.json", interval=30.0):
+        super().__init__(name="MetricsReporter", daemon=True)
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.snapshot(), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                logging.error(f"❌ Failed to write metrics: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.write()
+
+
+def serve_metrics(metrics: FetchMetrics, host="127.0.0.1", port=0) -> ThreadingHTTPServer:
+    """
+    GET /metrics ile anlık görüntüyü JSON olarak sunan yerel HTTP uç noktası başlatır.
+    port=0 iken boş bir port seçilir (adres loglanır); port kullanımdaysa OSError fırlatır.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            payload = json.dumps(metrics.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    logging.info(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,16 +1,16 @@
-import os
+import sys
 import json
 import time
 import random
 import requests
-from threading import Thread
-from typing import List
+from threading import Thread, Lock
+from queue import Queue, Empty
 import logging
 from pathlib import Path
-import socks
-import socket
-from stem import Signal
-from stem.control import Controller
+from court_case import cases_from_items
+from fetch_manifest import FetchManifest
+from rate_control import RateController, BACKOFF, NEUTRAL, status_signal
+from fetch_metrics import FetchMetrics, MetricsReporter, failure_reason, status_reason
 
 # Configure logging
 logging.basicConfig(
@@ -22,8 +22,17 @@ logging.basicConfig(
     ]
 )
 
-# Number of threads
-NUM_THREAD = 5
+# Number of isolated Tor circuits (one worker per circuit)
+NUM_CIRCUITS = 5
+
+# Rows per listing page
+PAGE_SIZE = 100
+
+# Bir sayfa için en çok deneme; aşılırsa PageFetchError ile vazgeçilir
+MAX_PAGE_ATTEMPTS = 10
+# 429 dışındaki 4xx yanıtlar (ör. 403 yasaklama) bu kadar tekrarlanırsa geri çekilme sinyali
+# verilir ve devre yenilenir; aynı çıkış düğümüyle denemeye devam etmek işe yaramaz
+CLIENT_ERROR_BACKOFF = 2
 
 # User-Agent list
 USER_AGENTS = [
@@ -31,67 +40,70 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
 ]
 
-class TorProxy:
-    def __init__(self, tor_host='localhost', tor_port=9050, control_host='localhost', control_port=9051):
+LIST_URL = "https://karararama.yargitay.gov.tr/aramadetaylist"
+
+class TorCircuit:
+    """
+    Tek bir yalıtılmış Tor devresi. Tor, SOCKS kimlik bilgisi farklı olan bağlantıları
+    (IsolateSOCKSAuth, varsayılan olarak açık) ayrı devrelere koyar; bu yüzden kimlik
+    bilgisini değiştirmek yalnızca bu devreyi yeniler, diğer işçilerin IP'sine dokunmaz.
+    """
+    def __init__(self, tor_host='localhost', tor_port=9050, isolation_key="circuit-0"):
         self.tor_host = tor_host
         self.tor_port = tor_port
-        self.control_host = control_host
-        self.control_port = control_port
-        self.socks_proxy = None
-        self.controller = None
-        self.setup_socks_proxy()
-
-    def setup_socks_proxy(self):
-        """Set up a SOCKS5 proxy connection with Tor."""
-        socks.set_default_proxy(socks.SOCKS5, self.tor_host, self.tor_port)
-        socket.socket = socks.socksocket  # Monkey patch socket module to route through Tor
+        self.isolation_key = isolation_key
+        self.generation = 0
+        self.lock = Lock()
 
     def get_proxy_dict(self):
-        """Return proxy dict with Tor SOCKS5."""
-        return {
-            'http': f'socks5h://{self.tor_host}:{self.tor_port}',
-            'https': f'socks5h://{self.tor_host}:{self.tor_port}',
-        }
+        """Return per-circuit proxy dict with Tor SOCKS5."""
+        with self.lock:
+            user = f"{self.isolation_key}-{self.generation}"
+        proxy_url = f'socks5h://{user}:x@{self.tor_host}:{self.tor_port}'
+        return {'http': proxy_url, 'https': proxy_url}
 
-    def renew_tor_ip(self):
-        """Request a new Tor circuit to get a new IP address."""
-        try:
-            with Controller.from_port(port=self.control_port) as controller:
-                controller.authenticate()  # Authenticate with the Tor control port
-                controller.signal(Signal.NEWNYM)  # Signal for a new Tor circuit (new IP)
-                logging.info("🌐 Successfully got a new Tor IP!")
-        except Exception as e:
-            logging.error(f"🚨 Failed to request new Tor IP: {e}")
-
-def simulate_wait(wait):
-    end_time = time.time() + wait
-    while time.time() < end_time:
-        time.sleep(1)
+    def renew(self):
+        """Yeni kimlik bilgisiyle bu devre için yeni bir çıkış düğümü iste."""
+        with self.lock:
+            self.generation += 1
+        logging.info(f"🌐 Renewed Tor circuit {self.isolation_key} (generation {self.generation})")
+
+class TorCircuitPool:
+    """Bir ya da daha fazla SOCKS portu üzerinde yalıtılmış Tor devreleri havuzu."""
+    def __init__(self, tor_host='localhost', socks_ports=(9050,), num_circuits=NUM_CIRCUITS):
+        self.circuits = [
+            TorCircuit(tor_host, socks_ports[i % len(socks_ports)], isolation_key=f"circuit-{i}")
+            for i in range(num_circuits)
+        ]
+
+class PageFetchError(RuntimeError):
+    """Liste sayfası MAX_PAGE_ATTEMPTS denemede alınamadı."""
 
 class PageFetcher:
-    def __init__(self, proxy: TorProxy):
-        self.proxy = proxy
+    def __init__(self, circuit: TorCircuit, controller: RateController = None, metrics: FetchMetrics = None,
+                 base_url=LIST_URL, max_attempts=MAX_PAGE_ATTEMPTS):
+        self.circuit = circuit
+        self.max_attempts = max_attempts
+        self.controller = controller or RateController()
+        self.metrics = metrics or FetchMetrics()
+        self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': random.choice(USER_AGENTS)
         })
 
-    def fetch_page(self, page_num: int, output_dir="pages"):
-        filename = f"page_{str(page_num)}.json"
-        out_path = Path(output_dir) / filename
-
-        if out_path.exists():
-            logging.debug(f"Skipping existing file: {filename}")
-            return True
-
-        target_url = "https://karararama.yargitay.gov.tr/aramadetaylist"
-        max_retries = 5  # Maximum attempts before giving up
+    def request_page(self, page_num: int) -> dict:
+        """
+        Tek bir liste sayfasını ister ve yanıtın 'data' kısmını döndürür; max_attempts
+        denemede alınamazsa PageFetchError fırlatır.
+        """
+        target_url = self.base_url
 
         payload = {
             "data": {
                 "arananKelime": "bir",
                 "pageNumber": page_num,
-                "pageSize": 100,
+                "pageSize": PAGE_SIZE,
                 "siralama": "1",
                 "siralamaDirection": "desc",
             }
@@ -103,53 +115,168 @@ class PageFetcher:
             "Accept-Encoding": "gzip, deflate, br",
         }
 
-        while True:
+        client_errors = 0
+        for attempt in range(1, self.max_attempts + 1):
+            # Sabit bekleme yok: denetleyici hata sinyallerine göre istekleri aralıklandırır
+            self.controller.acquire()
+            signal = NEUTRAL
+            reason = None
+            nbytes = 0
+            start = time.time()
             try:
-                # Use Tor's SOCKS5 proxy for the request
-                proxy = self.proxy.get_proxy_dict()
-                response = requests.post(
+                # Use this worker's own Tor circuit for the request
+                proxy = self.circuit.get_proxy_dict()
+                response = self.session.post(
                     target_url,
                     json=payload,
                     headers=headers,
-                    proxies=proxy,  # Use the Tor proxy here
+                    proxies=proxy,
                     timeout=15
                 )
 
+                nbytes = len(response.content)
                 if response.status_code == 200:
-                    data = response.json()
-                    with open(out_path, "w") as f:
-                        json.dump(data["data"], f, indent=4)
-                    logging.info(f"✅ Successfully fetched page {page_num}")
-                    return  # Exit after success
-                else:
-                    logging.warning(f"⚠️ Page {page_num} failed (Status: {response.status_code}), retrying...")
-                    simulate_wait(5)
+                    # Sinyal ancak gövde çözülünce OK olur
+                    data = response.json()["data"]
+                    signal = status_signal(response.status_code)
+                    return data
+                signal = status_signal(response.status_code)
+                reason = status_reason(response.status_code)
+                logging.warning(f"⚠️ Page {page_num} failed (Status: {response.status_code}, "
+                                f"attempt {attempt}/{self.max_attempts})")
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    client_errors += 1
+                    if client_errors >= CLIENT_ERROR_BACKOFF:
+                        signal = BACKOFF
+                        self.circuit.renew()
 
             except Exception as e:
-                logging.error(f"🚨 Error fetching page {page_num}: {e}, requesting new Tor IP...")
-                self.proxy.renew_tor_ip()  # Request new IP after error
-                simulate_wait(5)
-
-def worker(pages: List[int], proxy: TorProxy):
-    fetcher = PageFetcher(proxy)
-    for page in pages:
-        fetcher.fetch_page(page)
-
-def fetch_pages():
-    """Main function to manage multithreaded page fetching with Tor."""
-    start_page = 5001  # Start from page 5001
-    total_pages = 5000  # Adjust as needed
-    tor_proxy = TorProxy()  # Initialize Tor Proxy
-    threads = []
+                # Zaman aşımı ve 200 ile gelen bozuk gövde (ör. engelleme sayfası) 5xx gibi sayılır
+                if isinstance(e, (requests.Timeout, ValueError, KeyError, TypeError)):
+                    signal = BACKOFF
+                reason = failure_reason(e)
+                logging.error(f"🚨 Error fetching page {page_num}: {e}, renewing circuit {self.circuit.isolation_key}...")
+                self.circuit.renew()  # Yalnızca hata veren devre yenilenir
+
+            finally:
+                self.controller.release(signal)
+                self.metrics.record_request(self.circuit.isolation_key, time.time() - start, nbytes, reason)
+
+        raise PageFetchError(f"page {page_num}: giving up after {self.max_attempts} attempts")
 
-    for thread_id in range(NUM_THREAD):
-        page_list = [start_page + thread_id + i * NUM_THREAD  for i in range(total_pages // NUM_THREAD)]
-        t = Thread(target=worker, args=(page_list, tor_proxy), name=f"Thread-{thread_id+1}")
+    def fetch_page(self, page_num: int, output_dir="pages"):
+        filename = f"page_{str(page_num)}.json"
+        out_path = Path(output_dir) / filename
+
+        if out_path.exists():
+            logging.debug(f"Skipping existing file: {filename}")
+            return True
+
+        try:
+            data = self.request_page(page_num)
+        except PageFetchError as e:
+            logging.error(f"❌ {e}")
+            return False
+        with open(out_path, "w") as f:
+            json.dump(data, f, indent=4)
+        logging.info(f"✅ Successfully fetched page {page_num}")
+        return True
+
+def worker(queue: Queue, circuit: TorCircuit, controller: RateController, metrics: FetchMetrics,
+           output_dir="pages", base_url=LIST_URL):
+    fetcher = PageFetcher(circuit, controller=controller, metrics=metrics, base_url=base_url)
+    while True:
+        try:
+            page = queue.get_nowait()
+        except Empty:
+            return
+        fetcher.fetch_page(page, output_dir=output_dir)
+
+def fetch_pages(start_page=5001, total_pages=5000, pool: TorCircuitPool = None,
+                controller: RateController = None, metrics: FetchMetrics = None,
+                output_dir="pages", base_url=LIST_URL):
+    """Sayfaları ortak bir kuyruktan, her biri kendi Tor devresini kullanan işçilerle çeker."""
+    pool = pool or TorCircuitPool()
+    controller = controller or RateController()
+    metrics = metrics or FetchMetrics()
+    queue = Queue()
+    for page in range(start_page, start_page + total_pages):
+        queue.put(page)
+    metrics.register_gauge("queue_depth", queue.qsize)
+    metrics.register_gauge("rate_controller", controller.snapshot)
+
+    threads = []
+    for i, circuit in enumerate(pool.circuits):
+        t = Thread(target=worker, args=(queue, circuit, controller, metrics, output_dir, base_url),
+                   name=f"Thread-{i+1}")
         t.start()
         threads.append(t)
 
     for t in threads:
         t.join()
 
+def fetch_incremental(manifest: FetchManifest, circuit: TorCircuit = None, controller: RateController = None,
+                      metrics: FetchMetrics = None, output_dir="pages", base_url=LIST_URL, max_pages=None) -> int:
+    """
+    En yeni kararlardan (sayfa 1, azalan sıra) başlayarak yürür ve tamamı zaten bilinen
+    ilk dolu sayfada durur. Yeni satırlar sabit sayfa numaraları yerine bir delta dosyasına
+    yazılır; böylece yeni kararlar sayfa ofsetlerini kaydırsa da eski sayfalar bozulmaz.
+    Yeni kararlar manifest'e bekleyen olarak eklenir.
+    """
+    fetcher = PageFetcher(circuit or TorCircuit(), controller=controller, metrics=metrics, base_url=base_url)
+    new_rows = []
+    seen = set()
+    page_num = 1
+
+    while max_pages is None or page_num <= max_pages:
+        try:
+            rows = fetcher.request_page(page_num).get("data") or []
+        except PageFetchError as e:
+            # Önceki sayfalarda toplanan yeni satırlar yine yazılır ve kaydedilir. Bir sonraki
+            # artımlı çekim bu satırları bildiği için 1. sayfada durur; bu sayfadan eski yeni
+            # kararlar ancak tam taramayla (fetch_pages) gelir
+            logging.error(f"❌ {e}; stopping incremental fetch with {len(new_rows)} new decisions, "
+                          f"decisions from page {page_num} on need a full crawl")
+            break
+        ids = [str(row["id"]) for row in rows]
+        known = manifest.known_ids(ids) | seen
+        fresh = [row for row, row_id in zip(rows, ids) if row_id not in known]
+        new_rows.extend(fresh)
+        seen.update(ids)
+        logging.info(f"🔎 Page {page_num}: {len(fresh)} new of {len(rows)}")
+
+        if len(rows) < PAGE_SIZE:
+            break  # son sayfa
+        if not fresh:
+            break  # tamamı bilinen dolu sayfa: gerisi zaten elimizde
+        page_num += 1
+
+    if new_rows:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        out_path = Path(output_dir) / f"delta_{stamp}.json"
+        suffix = 1
+        while out_path.exists():  # aynı saniyedeki iki çalıştırma birbirinin dosyasını ezmesin
+            out_path = Path(output_dir) / f"delta_{stamp}-{suffix}.json"
+            suffix += 1
+        with open(out_path, "w") as f:
+            json.dump({"data": new_rows}, f, indent=4)
+        # Satırlar hemen manifest'e de eklenir (delta dosyası işlenmiş sayılır); böylece
+        # sync_manifest çalışmadan yapılan bir sonraki artımlı çekim doğru sayfada durur
+        stat = out_path.stat()
+        manifest.add_cases(((court.to_row(), court.generate_filename()) for court in cases_from_items(new_rows)),
+                           source=(out_path.name, stat.st_mtime, stat.st_size))
+        logging.info(f"✅ Wrote {len(new_rows)} new decisions to {out_path.name} ({page_num} requests)")
+    else:
+        logging.info(f"✅ No new decisions ({page_num} requests)")
+    return len(new_rows)
+
 if __name__ == "__main__":
-    fetch_pages()
+    metrics = FetchMetrics()
+    reporter = MetricsReporter(metrics, "page_metrics.json")
+    reporter.start()
+    if "--incremental" in sys.argv:
+        fetch_incremental(FetchManifest(), metrics=metrics)
+    else:
+        fetch_pages(metrics=metrics)
+    reporter.stop()
@@ -0,0 +1,76 @@
+import time
+import logging
+import threading
+
+# release() sinyalleri
+OK = "ok"            # sağlıklı yanıt: hız ve eşzamanlılık toplamsal olarak artar
+BACKOFF = "backoff"  # 429, 5xx, zaman aşımı, FMTY != SUCCESS: çarpımsal azalma
+NEUTRAL = "neutral"  # sunucuyla ilgisi olmayan hata (ör. ölü proxy): değişiklik yok
+
+
+def status_signal(status_code: int) -> str:
+    """HTTP durum kodunu denetleyici sinyaline çevirir."""
+    if status_code == 200:
+        return OK
+    if status_code == 429 or status_code >= 500:
+        return BACKOFF
+    return NEUTRAL
+
+
+class RateController:
+    """
+    Tüm çekim işçilerinin paylaştığı AIMD hız ve eşzamanlılık denetleyicisi.
+    Her istekten önce acquire(), sonra release(sinyal) çağrılır. Sağlıklı yanıtlar hızı
+    saniyede yaklaşık `additive_step` istek kadar artırır; sunucu zorlandığını gösterdiğinde
+    hız ve eşzamanlılık `decrease_factor` ile çarpılır. Aynı anda gelen bir hata dalgası
+    yalnızca bir kez düşüş yapsın diye düşüşler arasında en az `decrease_interval` beklenir.
+    """
+    def __init__(self, initial_rate=5.0, min_rate=0.2, max_rate=100.0, additive_step=0.5,
+                 initial_concurrency=16, min_concurrency=1, max_concurrency=512,
+                 decrease_factor=0.5, decrease_interval=2.0):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_step = additive_step
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.inflight = 0
+        self.next_slot = 0.0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.rate
+        # İstekleri mevcut hıza göre aralıklandır
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self, signal: str = OK):
+        with self.cond:
+            self.inflight -= 1
+            if signal == OK:
+                self.rate = min(self.max_rate, self.rate + self.additive_step / self.rate)
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            elif signal == BACKOFF:
+                now = time.monotonic()
+                if now - self.last_decrease >= self.decrease_interval:
+                    self.last_decrease = now
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+                    # Zaten planlanmış yuvaları da yeni hıza göre geri it
+                    self.next_slot = max(self.next_slot, now + 1.0 / self.rate)
+                    logging.warning(f"🐢 Backing off: {self.rate:.1f} req/s, concurrency {int(self.limit)}")
+            self.cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.cond:
+            return {"rate": self.rate, "concurrency": int(self.limit), "inflight": self.inflight}
@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.listing_crawl import ListingHandler, SocksStandIn
+from pages import PageFetcher, TorCircuitPool, fetch_pages
+from rate_control import RateController
+
+BASE_URL = "http://listing.local/aramadetaylist"
+
+
+class FlakyListingHandler(ListingHandler):
+    """İlk drop_requests isteği yanıt vermeden kapatır, sonrakilerde ListingHandler gibi davranır."""
+    drop_requests = 0
+
+    def do_POST(self):
+        if FlakyListingHandler.drop_requests > 0:
+            FlakyListingHandler.drop_requests -= 1
+            self.close_connection = True
+            return
+        super().do_POST()
+
+
+@pytest.fixture
+def stand_ins():
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyListingHandler)
+    http_server.daemon_threads = True
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    # Gecikme, ilk işçi tüm kuyruğu boşaltmadan diğer devrelerin de istek atmasını sağlar
+    socks_server = SocksStandIn(http_server.server_address, latency=0.05)
+    threading.Thread(target=socks_server.serve_forever, daemon=True).start()
+    yield socks_server
+    socks_server.shutdown()
+    http_server.shutdown()
+    FlakyListingHandler.drop_requests = 0
+
+
+def make_pool(socks_server, num_circuits):
+    return TorCircuitPool(tor_host="127.0.0.1", socks_ports=(socks_server.server_address[1],),
+                          num_circuits=num_circuits)
+
+
+def test_each_circuit_uses_its_own_socks_user(stand_ins, tmp_path):
+    pool = make_pool(stand_ins, 4)
+    fetch_pages(start_page=1, total_pages=12, pool=pool,
+                controller=RateController(initial_rate=1000.0, max_rate=10000.0),
+                output_dir=tmp_path, base_url=BASE_URL)
+
+    assert set(stand_ins.users) == {f"circuit-{i}-0" for i in range(4)}
+    for page in range(1, 13):
+        data = json.loads((tmp_path / f"page_{page}.json").read_text())
+        assert len(data["data"]) == 100
+        assert data["data"][0]["id"] == page * 100
+
+
+def test_failure_renews_only_the_failing_circuit(stand_ins, tmp_path):
+    pool = make_pool(stand_ins, 3)
+    before = [circuit.get_proxy_dict() for circuit in pool.circuits]
+    FlakyListingHandler.drop_requests = 1
+
+    fetcher = PageFetcher(pool.circuits[1], controller=RateController(initial_rate=1000.0, max_rate=10000.0),
+                          base_url=BASE_URL)
+    assert fetcher.fetch_page(7, output_dir=tmp_path)
+
+    after = [circuit.get_proxy_dict() for circuit in pool.circuits]
+    assert after[0] == before[0] and after[2] == before[2]
+    assert after[1] != before[1]
+    assert stand_ins.users == ["circuit-1-0", "circuit-1-1"]
+    assert (tmp_path / "page_7.json").exists()